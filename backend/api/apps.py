@@ -1,6 +1,18 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_save
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        from rest_framework.authtoken.models import Token
+
+        from .authentication import token_deleted
+        from .membership import MEMBERSHIPS, membership_changed
+
+        for model, field in MEMBERSHIPS.values():
+            post_save.connect(membership_changed, sender=model)
+            post_delete.connect(membership_changed, sender=model)
+        post_delete.connect(token_deleted, sender=Token)
@@ -0,0 +1,37 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import AuthenticationFailed
+
+from users.models import User
+
+
+def token_cache_key(key):
+    return f'auth_token:{key}'
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        user_id = cache.get(token_cache_key(key))
+        if user_id is None:
+            user, token = super().authenticate_credentials(key)
+            cache.set(
+                token_cache_key(key), user.id,
+                timeout=settings.AUTH_TOKEN_CACHE_TIMEOUT
+            )
+            return user, token
+        user = User.objects.filter(id=user_id).first()
+        if user is None or not user.is_active:
+            raise AuthenticationFailed(_('User inactive or deleted.'))
+        return user, Token(key=key, user=user)
+
+
+def forget_token(key):
+    transaction.on_commit(lambda: cache.delete(token_cache_key(key)))
+
+
+def token_deleted(sender, instance, **kwargs):
+    forget_token(instance.key)
@@ -1,9 +1,18 @@
+from django.db.models import Exists, OuterRef
 from django_filters import (
-    FilterSet, CharFilter, AllValuesMultipleFilter, ModelChoiceFilter
+    FilterSet, CharFilter, ChoiceFilter, NumberFilter, ModelChoiceFilter,
+    MultipleChoiceFilter
 )
 
 from users.models import User
-from recipes.models import Recipe, Ingredient
+from recipes.models import Recipe, Ingredient, Favorite, ShoppingCart
+from recipes.ranking import ORDERINGS
+from recipes.search import search_recipes
+from recipes.tag_mask import filter_by_tags, tag_bits
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_bits()]
 
 
 class IngredientFilter(FilterSet):
@@ -15,11 +24,41 @@ class IngredientFilter(FilterSet):
 
 
 class RecipeFilter(FilterSet):
-    tags = AllValuesMultipleFilter(
-        field_name='tags__slug'
-    )
+    tags = MultipleChoiceFilter(choices=tag_choices, method='filter_tags')
     author = ModelChoiceFilter(queryset=User.objects.all())
+    search = CharFilter(method='filter_search')
+    is_favorited = NumberFilter(method='filter_membership')
+    is_in_shopping_cart = NumberFilter(method='filter_membership')
+    ordering = ChoiceFilter(
+        choices=[(ordering, ordering) for ordering in ORDERINGS],
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
-        fields = ('author', 'tags',)
+        fields = (
+            'author', 'tags', 'search', 'is_favorited', 'is_in_shopping_cart',
+            'ordering',
+        )
+
+    def filter_tags(self, queryset, name, value):
+        return filter_by_tags(queryset, value)
+
+    def filter_search(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def filter_membership(self, queryset, name, value):
+        if not value:
+            return queryset
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.none()
+        model = Favorite if name == 'is_favorited' else ShoppingCart
+        return queryset.annotate(**{
+            f'{name}_flag': Exists(
+                model.objects.filter(user=user, recipe=OuterRef('pk'))
+            )
+        }).filter(**{f'{name}_flag': True})
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*ORDERINGS[value])
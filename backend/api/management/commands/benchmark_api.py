@@ -0,0 +1,154 @@
+import json
+import re
+import statistics
+import time
+from urllib.parse import urlencode
+from urllib.request import Request, urlopen
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+QUERIES = re.compile(r'desc="(\d+) queries"')
+
+
+def scenarios():
+    recipe = Recipe.objects.order_by('-favorites_count').first()
+    tag = Tag.objects.order_by('id').first()
+    ingredient = Ingredient.objects.order_by('name').first()
+    if recipe is None or tag is None or ingredient is None:
+        raise CommandError('Нет данных: запустите generate_fixtures')
+    return {
+        'recipe_list': '/api/recipes/',
+        'recipe_list_filtered': '/api/recipes/?' + urlencode(
+            {'tags': tag.slug, 'is_favorited': 1, 'limit': 6}
+        ),
+        'recipe_detail': f'/api/recipes/{recipe.id}/',
+        'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+        'shopping_cart': '/api/recipes/download_shopping_cart/',
+        'ingredient_search': '/api/ingredients/?' + urlencode(
+            {'name': ingredient.name[:3]}
+        ),
+    }
+
+
+def percentile(values, share):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(share * (len(values) - 1))))
+    return values[index]
+
+
+class Command(BaseCommand):
+    help = 'Нагрузочный замер основных эндпоинтов API'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument('--warmup', type=int, default=10)
+        parser.add_argument('--base-url')
+        parser.add_argument('--only', nargs='*')
+        parser.add_argument('--save')
+        parser.add_argument('--baseline')
+        parser.add_argument('--tolerance', type=float, default=0.2)
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(
+            following__isnull=False, shopping_cart__isnull=False
+        ).order_by('id').first()
+        if user is None:
+            raise CommandError('Нет данных: запустите generate_fixtures')
+        token, _ = Token.objects.get_or_create(user=user)
+        self.headers = {'Authorization': f'Token {token.key}'}
+        self.base_url = options['base_url']
+        self.client = Client(HTTP_AUTHORIZATION=self.headers['Authorization'])
+        results = {}
+        with override_settings(ALLOWED_HOSTS=['*']):
+            for name, url in scenarios().items():
+                if options['only'] and name not in options['only']:
+                    continue
+                results[name] = self.measure(
+                    url, options['requests'], options['warmup']
+                )
+                self.report(name, results[name])
+        report = {
+            'database': settings.DATABASES['default']['ENGINE'],
+            'transport': self.base_url or 'test-client',
+            'requests': options['requests'],
+            'results': results,
+        }
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+        if options['baseline']:
+            self.compare(results, options['baseline'], options['tolerance'])
+
+    def request(self, url):
+        if self.base_url:
+            with urlopen(Request(
+                self.base_url.rstrip('/') + url, headers=self.headers
+            )) as response:
+                response.read()
+                return response.status, response.headers['Server-Timing']
+        response = self.client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response.status_code, response['Server-Timing']
+
+    def measure(self, url, count, warmup):
+        for _ in range(warmup):
+            self.request(url)
+        timings = []
+        queries = []
+        start = time.perf_counter()
+        for _ in range(count):
+            request_start = time.perf_counter()
+            status, server_timing = self.request(url)
+            timings.append((time.perf_counter() - request_start) * 1000)
+            if status != 200:
+                raise CommandError(f'{url}: ответ {status}')
+            match = QUERIES.search(server_timing or '')
+            if match:
+                queries.append(int(match.group(1)))
+        elapsed = time.perf_counter() - start
+        return {
+            'url': url,
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p95_ms': round(percentile(timings, 0.95), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'rps': round(count / elapsed, 1),
+            'queries': round(statistics.mean(queries), 1) if queries else None,
+        }
+
+    def report(self, name, result):
+        self.stdout.write(
+            f'{name:22} p50 {result["p50_ms"]:8.2f} мс  '
+            f'p95 {result["p95_ms"]:8.2f} мс  '
+            f'p99 {result["p99_ms"]:8.2f} мс  '
+            f'{result["rps"]:8.1f} rps  '
+            f'запросов к БД {result["queries"]}'
+        )
+
+    def compare(self, results, path, tolerance):
+        with open(path, encoding='utf-8') as file:
+            baseline = json.load(file)['results']
+        regressions = []
+        for name, result in results.items():
+            base = baseline.get(name)
+            if base is None:
+                continue
+            if result['p95_ms'] > base['p95_ms'] * (1 + tolerance):
+                regressions.append(
+                    f'{name}: p95 {base["p95_ms"]} -> {result["p95_ms"]} мс'
+                )
+            if (result['queries'] or 0) > (base['queries'] or 0):
+                regressions.append(
+                    f'{name}: запросов {base["queries"]} -> '
+                    f'{result["queries"]}'
+                )
+        if regressions:
+            raise CommandError('\n'.join(regressions))
+        self.stdout.write(self.style.SUCCESS('Регрессий нет'))
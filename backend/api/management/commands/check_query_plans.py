@@ -0,0 +1,65 @@
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from api.query_plans import (
+    PlanError, analyze, capture_plans, compare_plans, plan_scenarios,
+    plan_user
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка планов выполнения запросов основных эндпоинтов API '
+        'на сгенерированных данных'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--only', nargs='*')
+        parser.add_argument('--save')
+        parser.add_argument('--baseline')
+        parser.add_argument('--tolerance', type=float, default=0.5)
+        parser.add_argument('--min-rows', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            token, _ = Token.objects.get_or_create(user=plan_user())
+            client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+            analyze()
+            results = {}
+            with override_settings(ALLOWED_HOSTS=['*']):
+                for name, url in plan_scenarios().items():
+                    if options['only'] and name not in options['only']:
+                        continue
+                    results[name] = capture_plans(client, url)
+        except PlanError as error:
+            raise CommandError(error)
+        for name, plans in results.items():
+            self.stdout.write(f'{name:24} запросов {len(plans)}')
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as file:
+                baseline = json.load(file)['plans']
+        failures = compare_plans(
+            results, baseline, options['min_rows'], options['tolerance']
+        )
+        if baseline is None:
+            for failure in failures:
+                self.stdout.write(self.style.WARNING(failure))
+            failures = []
+        if options['save']:
+            with open(options['save'], 'w', encoding='utf-8') as file:
+                json.dump(
+                    {
+                        'database': settings.DATABASES['default']['ENGINE'],
+                        'plans': results,
+                    },
+                    file, ensure_ascii=False, indent=2
+                )
+        if failures:
+            raise CommandError('\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('Регрессий планов нет'))
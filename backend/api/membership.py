@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscribe
+
+MEMBERSHIPS = {
+    'favorites': (Favorite, 'recipe_id'),
+    'shopping_cart': (ShoppingCart, 'recipe_id'),
+    'following': (Subscribe, 'author_id'),
+}
+
+
+def cache_key(kind, user_id):
+    return f'membership:{kind}:{user_id}'
+
+
+def load(kind, user_id):
+    model, field = MEMBERSHIPS[kind]
+    return set(
+        model.objects.filter(user_id=user_id).values_list(field, flat=True)
+    )
+
+
+def refresh(kind, user_id):
+    cache.set(
+        cache_key(kind, user_id), load(kind, user_id),
+        timeout=settings.MEMBERSHIP_CACHE_TIMEOUT
+    )
+
+
+def get_memberships(user):
+    keys = {cache_key(kind, user.id): kind for kind in MEMBERSHIPS}
+    cached = cache.get_many(keys)
+    memberships = {keys[key]: value for key, value in cached.items()}
+    missing = {
+        cache_key(kind, user.id): load(kind, user.id)
+        for kind in MEMBERSHIPS if kind not in memberships
+    }
+    if missing:
+        cache.set_many(missing, timeout=settings.MEMBERSHIP_CACHE_TIMEOUT)
+        memberships.update(
+            (keys[key], value) for key, value in missing.items()
+        )
+    return memberships
+
+
+def request_memberships(request):
+    if not hasattr(request, 'memberships'):
+        request.memberships = get_memberships(request.user)
+    return request.memberships
+
+
+def memberships_changed(sender, user_id):
+    kind = next(
+        kind for kind, (model, field) in MEMBERSHIPS.items()
+        if model is sender
+    )
+    transaction.on_commit(lambda: refresh(kind, user_id))
+
+
+def membership_changed(sender, instance, **kwargs):
+    memberships_changed(sender, instance.user_id)
@@ -0,0 +1,138 @@
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination
+)
+from rest_framework.response import Response
+
+from recipes.feed import feed_page
+from recipes.ranking import ORDERINGS
+
+
+class PageLimitPagination(PageNumberPagination):
+    page_size_query_param = 'limit'
+
+
+class KeysetPagination(CursorPagination):
+    ordering = ('-pub_date', '-id')
+    page_size_query_param = 'limit'
+    ranked_query_params = ('search',)
+    ranked_orderings = ORDERINGS
+
+    def __init__(self):
+        self.delegate = None
+
+    def use_page_numbers(self, request):
+        if any(request.query_params.get(param)
+               for param in self.ranked_query_params):
+            return True
+        return (settings.PAGINATION_PAGE_COMPAT
+                and self.cursor_query_param not in request.query_params)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        ordering = self.ranked_orderings.get(
+            request.query_params.get('ordering')
+        )
+        if self.use_page_numbers(request):
+            self.delegate = PageLimitPagination()
+        elif ordering:
+            self.delegate = RankedPagination()
+            self.delegate.ordering = ordering
+        else:
+            return super().paginate_queryset(queryset, request, view)
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.delegate is not None:
+            return self.delegate.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+
+class SubscriptionsKeysetPagination(KeysetPagination):
+    ordering = ('username',)
+    ranked_orderings = {}
+
+
+class ForwardKeysetPagination(CursorPagination):
+    page_size_query_param = 'limit'
+
+    def start(self, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.next_position = None
+
+    def decode_position(self, request, *parsers):
+        if not request.query_params.get(self.cursor_query_param, '').strip():
+            return None
+        cursor = self.decode_cursor(request)
+        values = (cursor.position or '').split('|')
+        try:
+            position = tuple(
+                parse(value) for parse, value in zip(parsers, values)
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(values) != len(parsers) or None in position:
+            raise NotFound(self.invalid_cursor_message)
+        return position
+
+    def trim(self, page, position):
+        if len(page) > self.page_size:
+            self.next_position = position(page[self.page_size - 1])
+        return page[:self.page_size]
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False, position='|'.join(
+                value.isoformat() if hasattr(value, 'isoformat')
+                else str(value)
+                for value in self.next_position
+            )
+        ))
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', None),
+            ('results', data),
+        ]))
+
+
+class RankedPagination(ForwardKeysetPagination):
+    def paginate_queryset(self, queryset, request, view=None):
+        self.start(request)
+        fields = [field.lstrip('-') for field in self.ordering]
+        position = self.decode_position(request, *(
+            queryset.model._meta.get_field(field).to_python
+            for field in fields
+        ))
+        if position is not None:
+            (value_field, id_field), (value, pk) = fields, position
+            queryset = queryset.filter(
+                Q(**{f'{value_field}__lt': value})
+                | Q(**{value_field: value, f'{id_field}__lt': pk})
+            )
+        return self.trim(
+            list(queryset.order_by(*self.ordering)[:self.page_size + 1]),
+            lambda instance: tuple(
+                getattr(instance, field) for field in fields
+            )
+        )
+
+
+class FeedPagination(ForwardKeysetPagination):
+    def paginate_feed(self, user, request):
+        self.start(request)
+        position = self.decode_position(request, parse_datetime, int)
+        page = self.trim(
+            feed_page(user.id, self.page_size, position), tuple
+        )
+        return [recipe_id for pub_date, recipe_id in page]
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import re
+from urllib.parse import urlencode
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from recipes.models import Ingredient, Recipe, Tag
+from users.models import User
+
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+LISTS = re.compile(r'\(\?(?:, \?)*\)')
+SQLITE_SCAN = re.compile(
+    r'^SCAN (?:TABLE )?(\w+)(?:.* USING (?:COVERING )?INDEX (\w+))?'
+)
+ALIASES = re.compile(r'(?:FROM|JOIN) "(\w+)" ([A-Z]\d+)\b')
+
+
+class PlanError(Exception):
+    pass
+
+
+def plan_scenarios():
+    recipe = Recipe.objects.order_by('-favorites_count', 'id').first()
+    author = User.objects.order_by('-recipes_count', 'id').first()
+    tag = Tag.objects.order_by('id').first()
+    ingredient = Ingredient.objects.order_by('name').first()
+    if None in (recipe, author, tag, ingredient):
+        raise PlanError('Нет данных: запустите generate_fixtures')
+    prefix = ingredient.name[:3]
+    return {
+        'recipe_list': '/api/recipes/',
+        'recipe_list_filtered': '/api/recipes/?' + urlencode(
+            {'tags': tag.slug, 'is_favorited': 1, 'limit': 6}
+        ),
+        'recipe_detail': f'/api/recipes/{recipe.id}/',
+        'subscriptions': '/api/users/subscriptions/?recipes_limit=3',
+        'shopping_cart': '/api/recipes/download_shopping_cart/',
+        'ingredient_search': '/api/ingredients/?' + urlencode(
+            {'name': prefix}
+        ),
+        'recipe_list_author': f'/api/recipes/?author={author.id}',
+        'recipe_list_popular': '/api/recipes/?ordering=popular',
+        'recipe_feed': '/api/recipes/feed/',
+        'recipe_similar': f'/api/recipes/{recipe.id}/similar/',
+        'shopping_cart_summary': '/api/recipes/shopping_cart/summary/',
+        'user_detail': f'/api/users/{author.id}/',
+        'ingredient_search_sql': '/api/ingredients/?' + urlencode(
+            {'name': prefix, 'search': prefix}
+        ),
+    }
+
+
+def plan_user():
+    user = User.objects.filter(
+        following__isnull=False, shopping_cart__isnull=False
+    ).order_by('id').first()
+    if user is None:
+        raise PlanError('Нет данных: запустите generate_fixtures')
+    return user
+
+
+def normalize(sql):
+    return LISTS.sub('(...)', LITERALS.sub('?', sql))
+
+
+def fingerprint(sql):
+    return hashlib.sha1(normalize(sql).encode()).hexdigest()[:12]
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from plan_nodes(child)
+
+
+def explain(sql):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}')
+            data = cursor.fetchone()[0]
+            if isinstance(data, str):
+                data = json.loads(data)
+            plan = data[0]['Plan']
+            return plan['Total Cost'], sorted({
+                node['Relation Name'] for node in plan_nodes(plan)
+                if node['Node Type'] == 'Seq Scan'
+            })
+        tables = set(connection.introspection.table_names(cursor))
+        aliases = {alias: table for table, alias in ALIASES.findall(sql)}
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        scans = set()
+        for row in cursor.fetchall():
+            match = SQLITE_SCAN.match(row[-1])
+            if not match:
+                continue
+            table = aliases.get(match.group(1), match.group(1))
+            if table in tables:
+                scans.add(
+                    f'{table} USING {match.group(2)}' if match.group(2)
+                    else table
+                )
+        return None, sorted(scans)
+
+
+def analyze():
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def capture_plans(client, url):
+    cache.clear()
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+        if response.streaming:
+            b''.join(response.streaming_content)
+    if response.status_code != 200:
+        raise PlanError(f'{url}: ответ {response.status_code}')
+    plans = {}
+    for query in context.captured_queries:
+        sql = query['sql']
+        if not sql.lstrip().upper().startswith('SELECT'):
+            continue
+        cost, scans = explain(sql)
+        plans[fingerprint(sql)] = {
+            'sql': normalize(sql),
+            'cost': cost,
+            'scans': scans,
+        }
+    return plans
+
+
+def table_sizes():
+    sizes = {}
+    with connection.cursor() as cursor:
+        for table in connection.introspection.table_names(cursor):
+            cursor.execute(
+                f'SELECT COUNT(*) FROM {connection.ops.quote_name(table)}'
+            )
+            sizes[table] = cursor.fetchone()[0]
+    return sizes
+
+
+def plan_problems(plan, base, sizes, min_rows=1000, tolerance=0.5):
+    allowed = set(base['scans']) if base else set()
+    for scan in plan['scans']:
+        if scan in allowed or (base is None and ' USING ' in scan):
+            continue
+        table = scan.split()[0]
+        if sizes.get(table, 0) < min_rows:
+            continue
+        yield f'полное чтение {scan} ({sizes[table]} строк)'
+    if base and base['cost'] and plan['cost'] is not None:
+        if plan['cost'] > base['cost'] * (1 + tolerance):
+            yield f'стоимость {base["cost"]} -> {plan["cost"]}'
+
+
+def compare_plans(results, baseline, min_rows=1000, tolerance=0.5):
+    sizes = table_sizes()
+    return [
+        f'{name} [{key}]: {problem}'
+        for name, plans in results.items()
+        for key, plan in plans.items()
+        for problem in plan_problems(
+            plan, (baseline or {}).get(name, {}).get(key), sizes,
+            min_rows, tolerance
+        )
+    ]
@@ -1,12 +1,27 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 from djoser.serializers import UserSerializer as DjoserUserSerializer
 from drf_extra_fields.fields import Base64ImageField
 
+from foodgram.middleware import timed
+from recipes.cart import recipes_updating
 from recipes.models import Tag, Ingredient, IngredientsInRecipe, Recipe
-from users.models import User, Subscribe
+from recipes.pantry import recipes_changed
+from recipes.search import update_search_index
+from recipes.similarity import reset_similar
+from users.models import User
+from .membership import request_memberships
 
 
-class UserSerializer(DjoserUserSerializer):
+class TimedSerializerMixin:
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+
+class UserSerializer(TimedSerializerMixin, DjoserUserSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
@@ -17,26 +32,28 @@ class UserSerializer(DjoserUserSerializer):
         )
 
     def get_is_subscribed(self, obj):
-        user = self.context.get('request').user
-        if not user.is_authenticated:
+        request = self.context.get('request')
+        if not request.user.is_authenticated:
             return False
-        return Subscribe.objects.filter(user=user, author=obj).exists()
+        return obj.id in request_memberships(request)['following']
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(TimedSerializerMixin,
+                    serializers.ModelSerializer):
     class Meta:
         model = Tag
         fields = ('id', 'name', 'color', 'slug',)
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(TimedSerializerMixin,
+                           serializers.ModelSerializer):
     class Meta:
         model = Ingredient
         fields = ('id', 'name', 'measurement_unit',)
 
 
 class IngredientsInRecipeSerializer(serializers.ModelSerializer):
-    id = serializers.PrimaryKeyRelatedField(queryset=Ingredient.objects.all())
+    id = serializers.IntegerField()
     name = serializers.CharField(source='ingredient.name', read_only=True)
     measurement_unit = serializers.ReadOnlyField(
         source='ingredient.measurement_unit'
@@ -52,7 +69,8 @@ class IngredientsInRecipeSerializer(serializers.ModelSerializer):
         return data
 
 
-class RecipeReadSerializer(serializers.ModelSerializer):
+class RecipeReadSerializer(TimedSerializerMixin,
+                           serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
     tags = TagSerializer(read_only=True, many=True)
     image = Base64ImageField()
@@ -72,69 +90,144 @@ class RecipeReadSerializer(serializers.ModelSerializer):
         )
 
     def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if not user.is_authenticated:
+        request = self.context.get('request')
+        if not request.user.is_authenticated:
             return False
-        return Recipe.objects.filter(favorites__user=user, id=obj.id).exists()
+        return obj.id in request_memberships(request)['favorites']
 
     def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if not user.is_authenticated:
+        request = self.context.get('request')
+        if not request.user.is_authenticated:
             return False
-        return Recipe.objects.filter(
-            shopping_cart__user=user,
-            id=obj.id
-        ).exists()
+        return obj.id in request_memberships(request)['shopping_cart']
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     author = UserSerializer(read_only=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(),
-        many=True
-    )
+    tags = serializers.ListField(child=serializers.IntegerField())
     image = Base64ImageField(use_url=True)
     ingredients = IngredientsInRecipeSerializer(
         source='ingredientsinrecipe_set',
         many=True
     )
     cooking_time = serializers.IntegerField()
-    is_favorited = serializers.SerializerMethodField()
-    is_in_shopping_cart = serializers.SerializerMethodField()
 
     class Meta:
         model = Recipe
         fields = (
-            'tags', 'author', 'is_favorited', 'is_in_shopping_cart',
-            'name', 'image', 'text', 'cooking_time', 'id', 'ingredients'
+            'tags', 'author', 'name', 'image', 'text', 'cooking_time', 'id',
+            'ingredients'
         )
 
     def ingredients_create(self, ingredients, recipe):
         ingredients_list = [
             IngredientsInRecipe(
-                ingredient=ingredient['id'],
+                ingredient_id=ingredient['id'],
                 recipe=recipe,
                 amount=ingredient['amount']
             ) for ingredient in ingredients
         ]
         IngredientsInRecipe.objects.bulk_create(ingredients_list)
 
+    def ingredients_update(self, ingredients, recipe):
+        stored = {
+            item.ingredient_id: item
+            for item in recipe.ingredientsinrecipe_set.all()
+        }
+        incoming = {
+            ingredient['id']: ingredient for ingredient in ingredients
+        }
+        removed = [
+            item.id for ingredient_id, item in stored.items()
+            if ingredient_id not in incoming
+        ]
+        changed = []
+        for ingredient_id, item in stored.items():
+            ingredient = incoming.get(ingredient_id)
+            if ingredient and item.amount != ingredient['amount']:
+                item.amount = ingredient['amount']
+                changed.append(item)
+        added = [
+            ingredient for ingredient_id, ingredient in incoming.items()
+            if ingredient_id not in stored
+        ]
+        if not (removed or changed or added):
+            return False
+        with recipes_updating([recipe.id]):
+            if removed:
+                IngredientsInRecipe.objects.filter(id__in=removed).delete()
+            if changed:
+                IngredientsInRecipe.objects.bulk_update(changed, ['amount'])
+            if added:
+                self.ingredients_create(added, recipe)
+        return bool(removed or added)
+
+    @staticmethod
+    def same_image(stored, uploaded):
+        if not stored:
+            return False
+        try:
+            if stored.size != uploaded.size:
+                return False
+            with stored.open('rb') as file:
+                return file.read() == uploaded.read()
+        except (OSError, ValueError):
+            return False
+        finally:
+            uploaded.seek(0)
+
+    @transaction.atomic
     def create(self, validated_data):
         ingredients = validated_data.pop('ingredientsinrecipe_set')
         image = validated_data.pop('image')
         tags_data = validated_data.pop('tags')
         recipe = Recipe.objects.create(image=image, **validated_data)
         self.ingredients_create(ingredients, recipe)
-        recipe.tags.set(tags_data)
+        recipe.tags.add(*tags_data)
+        update_search_index([recipe.id])
+        recipes_changed([recipe.id])
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
-        IngredientsInRecipe.objects.filter(recipe=instance).delete()
-        ingredients = validated_data.pop('ingredientsinrecipe_set')
-        tags = validated_data.pop('tags')
-        instance.tags.set(tags)
-        self.ingredients_create(ingredients=ingredients, recipe=instance)
-        return super().update(instance, validated_data)
+        ingredients = validated_data.pop('ingredientsinrecipe_set', None)
+        tags = validated_data.pop('tags', None)
+        image = validated_data.get('image')
+        if image and self.same_image(instance.image, image):
+            validated_data.pop('image')
+        reindex = ingredients is not None and self.ingredients_update(
+            ingredients, instance
+        )
+        retagged = tags is not None and set(tags) != {
+            tag.id for tag in instance.tags.all()
+        }
+        if retagged:
+            instance.tags.set(tags)
+        changed = [
+            field for field, value in validated_data.items()
+            if getattr(instance, field) != value
+        ]
+        for field in changed:
+            setattr(instance, field, validated_data[field])
+        if changed:
+            instance.save(update_fields=changed)
+        if reindex or {'name', 'text'} & set(changed):
+            update_search_index([instance.id])
+        if reindex:
+            recipes_changed([instance.id])
+        if reindex or retagged:
+            reset_similar([instance.id])
+        return instance
+
+    def validate_tags(self, value):
+        missing = set(value) - set(
+            Tag.objects.filter(id__in=value).values_list('id', flat=True)
+        )
+        if missing:
+            raise serializers.ValidationError(
+                f'Теги не найдены: {sorted(missing)}'
+            )
+        return value
 
     def validate(self, data):
         ingredients = data.get('ingredientsinrecipe_set')
@@ -142,37 +235,35 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError({
                 'ingredients': 'Нужен хотя бы один ингредиент в рецепте'
             })
-        valid_ingredients = []
+        existing = set(Ingredient.objects.filter(
+            id__in=[ingredient['id'] for ingredient in ingredients]
+        ).values_list('id', flat=True))
+        seen = set()
+        errors = []
         for ingredient in ingredients:
-            amount = ingredient['amount']
-            if amount == 0:
-                raise serializers.ValidationError({
-                    'ingredients': 'Количество должно быть больше 0'
-                })
-            if ingredient in valid_ingredients:
-                raise serializers.ValidationError({
-                    'ingredients': 'Такой ингредиент уже есть в рецепте'
-                })
-            valid_ingredients.append(ingredient)
+            error = {}
+            if ingredient['id'] not in existing:
+                error['id'] = [f'Ингредиент {ingredient["id"]} не найден']
+            elif ingredient['id'] in seen:
+                error['id'] = ['Такой ингредиент уже есть в рецепте']
+            if ingredient['amount'] == 0:
+                error['amount'] = ['Количество должно быть больше 0']
+            seen.add(ingredient['id'])
+            errors.append(error)
+        if any(errors):
+            raise serializers.ValidationError({'ingredients': errors})
         return data
 
-    def get_is_favorited(self, obj):
-        user = self.context.get('request').user
-        if not user.is_authenticated:
-            return False
-        return Recipe.objects.filter(favorites__user=user, id=obj.id).exists()
-
-    def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        if not user.is_authenticated:
-            return False
-        return Recipe.objects.filter(
-            shopping_cart__user=user,
-            id=obj.id
-        ).exists()
+    def to_representation(self, instance):
+        prefetch_related_objects([instance], Prefetch(
+            'ingredientsinrecipe_set',
+            queryset=IngredientsInRecipe.objects.select_related('ingredient')
+        ))
+        return RecipeReadSerializer(instance, context=self.context).data
 
 
-class FavoriteCartSerializer(serializers.ModelSerializer):
+class FavoriteCartSerializer(TimedSerializerMixin,
+                             serializers.ModelSerializer):
     name = serializers.ReadOnlyField(source='recipe.name')
     image = Base64ImageField(source='recipe.image', read_only=True)
     cooking_time = serializers.ReadOnlyField(source='recipe.cooking_time')
@@ -185,39 +276,49 @@ class FavoriteCartSerializer(serializers.ModelSerializer):
 
 class SubscribeSerializer(UserSerializer):
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.SerializerMethodField(read_only=True)
-    id = serializers.ReadOnlyField(source='author.id')
-    email = serializers.ReadOnlyField(source='author.email')
-    username = serializers.ReadOnlyField(source='author.username')
-    first_name = serializers.ReadOnlyField(source='author.first_name')
-    last_name = serializers.ReadOnlyField(source='author.last_name')
-    is_subscribed = serializers.SerializerMethodField()
 
     class Meta:
-        model = Subscribe
+        model = User
         fields = ('email', 'id', 'username', 'first_name', 'last_name',
                   'is_subscribed', 'recipes', 'recipes_count')
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes_limit = request.GET.get('recipes_limit')
-        recipes = Recipe.objects.filter(author=obj.author)
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
+        recipes = getattr(obj, 'latest_recipes', None)
+        if recipes is None:
+            request = self.context.get('request')
+            recipes_limit = request.GET.get('recipes_limit')
+            recipes = Recipe.objects.filter(author=obj)
+            if recipes_limit:
+                recipes = recipes[:int(recipes_limit)]
         return RecipeSubscribeSerializer(recipes, many=True).data
 
-    def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
 
-    def get_is_subscribed(self, obj):
-        return Subscribe.objects.filter(
-            user=obj.user, author=obj.author
-        ).exists()
-
-
-class RecipeSubscribeSerializer(serializers.ModelSerializer):
+class RecipeSubscribeSerializer(TimedSerializerMixin,
+                                serializers.ModelSerializer):
     image = Base64ImageField()
 
     class Meta:
         model = Recipe
         fields = ('id', 'name', 'image', 'cooking_time')
+
+
+class BatchSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_SIZE
+    )
+
+
+class PantrySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=settings.PANTRY_MAX_INGREDIENTS
+    )
+    min_coverage = serializers.FloatField(
+        min_value=0, max_value=1, default=settings.PANTRY_MIN_COVERAGE
+    )
+    limit = serializers.IntegerField(
+        min_value=1, max_value=100, default=settings.PANTRY_RESULTS_LIMIT
+    )
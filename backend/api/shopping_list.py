@@ -0,0 +1,193 @@
+import csv
+import json
+
+from recipes.models import CartIngredient, IngredientsInRecipe
+from recipes.units import aggregate_amounts, normalize_amount
+
+CHUNK_SIZE = 2000
+LINES_PER_PAGE = 50
+GROUPS = {
+    'recipe': 'recipe__name',
+    'tag': 'recipe__tags__name',
+}
+NO_GROUP = 'Без тега'
+TITLE = 'Список продуктов к покупке:'
+
+
+def shopping_cart_rows(user, group_by=None):
+    group_field = GROUPS.get(group_by)
+    if group_field:
+        rows = aggregate_amounts(
+            IngredientsInRecipe.objects.filter(
+                recipe__shopping_cart__user=user
+            ),
+            group_field
+        )
+    else:
+        rows = aggregate_amounts(CartIngredient.objects.filter(user=user))
+    for *group, name, unit, amount in rows.iterator(chunk_size=CHUNK_SIZE):
+        group = (group[0] or NO_GROUP) if group_field else None
+        yield group, name, unit, normalize_amount(amount)
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+class TextExporter:
+    content_type = 'text/plain; charset=utf-8'
+    extension = 'txt'
+
+    def render(self, rows):
+        yield f'{TITLE}\n'
+        current_group = None
+        for group, name, unit, amount in rows:
+            if group is not None and group != current_group:
+                current_group = group
+                yield f'\n{group}:\n'
+            yield f'{name} - {amount} {unit}\n'
+
+
+class CsvExporter:
+    content_type = 'text/csv; charset=utf-8'
+    extension = 'csv'
+
+    def render(self, rows):
+        writer = csv.writer(Echo())
+        yield writer.writerow(
+            ('group', 'name', 'measurement_unit', 'amount')
+        )
+        for group, name, unit, amount in rows:
+            yield writer.writerow((group or '', name, unit, amount))
+
+
+class JsonExporter:
+    content_type = 'application/json; charset=utf-8'
+    extension = 'json'
+
+    def render(self, rows):
+        separator = '['
+        for group, name, unit, amount in rows:
+            item = {'name': name, 'measurement_unit': unit, 'amount': amount}
+            if group is not None:
+                item['group'] = group
+            yield separator + json.dumps(item, ensure_ascii=False)
+            separator = ','
+        yield '[]' if separator == '[' else ']'
+
+
+def cyrillic_glyph(char):
+    code = ord(char)
+    if char == 'Ё':
+        return 'afii10023'
+    if char == 'ё':
+        return 'afii10071'
+    if 0x410 <= code <= 0x42F:
+        index = code - 0x410
+        return f'afii{10017 + index + (index >= 6)}'
+    index = code - 0x430
+    return f'afii{10065 + index + (index >= 6)}'
+
+
+class PdfExporter:
+    content_type = 'application/pdf'
+    extension = 'pdf'
+    encoding = 'cp1251'
+
+    def __init__(self):
+        self.offsets = {}
+        self.position = 0
+
+    def font_encoding(self):
+        letters = 'ЁёАБВГДЕЖЗИЙКЛМНОПРСТУФХЦЧШЩЪЫЬЭЮЯ' + (
+            'абвгдежзийклмнопрстуфхцчшщъыьэюя'
+        )
+        differences = ' '.join(
+            f'{letter.encode(self.encoding)[0]} /{cyrillic_glyph(letter)}'
+            for letter in letters
+        )
+        return (
+            '<< /Type /Encoding /BaseEncoding /WinAnsiEncoding '
+            f'/Differences [{differences}] >>'
+        )
+
+    def text(self, value):
+        data = str(value).encode(self.encoding, errors='replace')
+        return data.replace(b'\\', b'\\\\').replace(
+            b'(', b'\\('
+        ).replace(b')', b'\\)')
+
+    def obj(self, number, body):
+        self.offsets[number] = self.position
+        data = f'{number} 0 obj\n'.encode() + body + b'\nendobj\n'
+        self.position += len(data)
+        return data
+
+    def page(self, number, lines):
+        content = b'BT /F1 11 Tf 50 800 Td 14 TL\n' + b''.join(
+            b'(' + self.text(line) + b') Tj T*\n' for line in lines
+        ) + b'ET'
+        stream = self.obj(
+            number,
+            f'<< /Length {len(content)} >>\nstream\n'.encode()
+            + content + b'\nendstream'
+        )
+        return stream + self.obj(number + 1, (
+            '<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] '
+            '/Resources << /Font << /F1 3 0 R >> >> '
+            f'/Contents {number} 0 R >>'
+        ).encode())
+
+    def lines(self, rows):
+        yield TITLE
+        current_group = None
+        for group, name, unit, amount in rows:
+            if group is not None and group != current_group:
+                current_group = group
+                yield ''
+                yield f'{group}:'
+            yield f'{name} - {amount} {unit}'
+
+    def render(self, rows):
+        header = b'%PDF-1.4\n'
+        self.position = len(header)
+        yield header
+        yield self.obj(3, (
+            '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica '
+            f'/Encoding {self.font_encoding()} >>'
+        ).encode())
+        pages = []
+        number = 4
+        lines = []
+        for line in self.lines(rows):
+            lines.append(line)
+            if len(lines) == LINES_PER_PAGE:
+                yield self.page(number, lines)
+                pages.append(number + 1)
+                number += 2
+                lines = []
+        if lines or not pages:
+            yield self.page(number, lines)
+            pages.append(number + 1)
+            number += 2
+        kids = ' '.join(f'{page} 0 R' for page in pages)
+        yield self.obj(2, (
+            f'<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>'
+        ).encode())
+        yield self.obj(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+        xref = [f'xref\n0 {number}\n', '0000000000 65535 f \n']
+        xref.extend(
+            f'{self.offsets[obj]:010d} 00000 n \n' for obj in range(1, number)
+        )
+        yield ''.join(xref).encode()
+        yield (
+            f'trailer\n<< /Size {number} /Root 1 0 R >>\n'
+            f'startxref\n{self.position}\n%%EOF\n'
+        ).encode()
+
+
+EXPORTERS = {
+    exporter.extension: exporter
+    for exporter in (TextExporter, CsvExporter, JsonExporter, PdfExporter)
+}
@@ -0,0 +1,39 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.models import User
+
+
+class CachedTokenAuthenticationTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def me(self):
+        return self.client.get('/api/users/me/')
+
+    def test_user_is_loaded_fresh(self):
+        self.assertEqual(self.me().status_code, HTTPStatus.OK)
+        User.objects.filter(id=self.user.id).update(first_name='Новое')
+        response = self.me()
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response.json()['first_name'], 'Новое')
+
+    def test_deactivated_user_is_rejected(self):
+        self.assertEqual(self.me().status_code, HTTPStatus.OK)
+        User.objects.filter(id=self.user.id).update(is_active=False)
+        self.assertEqual(self.me().status_code, HTTPStatus.UNAUTHORIZED)
+
+    def test_deleted_token_is_rejected(self):
+        self.assertEqual(self.me().status_code, HTTPStatus.OK)
+        self.token.delete()
+        self.assertEqual(self.me().status_code, HTTPStatus.UNAUTHORIZED)
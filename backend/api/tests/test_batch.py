@@ -0,0 +1,58 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe
+from users.models import User
+
+
+class BatchToggleTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        self.recipes = [
+            Recipe.objects.create(author=self.user, name=name, text='т')
+            for name in ('первый', 'второй')
+        ]
+        self.ids = [recipe.id for recipe in self.recipes]
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def favorited(self):
+        return sorted(
+            recipe['id'] for recipe in
+            self.client.get('/api/recipes/').json()['results']
+            if recipe['is_favorited']
+        )
+
+    def counters(self):
+        return list(Recipe.objects.filter(id__in=self.ids).order_by(
+            'id'
+        ).values_list('favorites_count', flat=True))
+
+    def batch(self, method, ids):
+        response = getattr(self.client, method)(
+            '/api/recipes/favorite/batch/', {'ids': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        return [result['status'] for result in response.json()]
+
+    def test_batch_add_and_remove(self):
+        self.assertEqual(self.favorited(), [])
+        self.assertEqual(self.batch('post', self.ids), ['created'] * 2)
+        self.assertEqual(self.favorited(), self.ids)
+        self.assertEqual(self.counters(), [1, 1])
+        self.assertEqual(
+            self.batch('delete', self.ids + [0]),
+            ['deleted', 'deleted', 'not_found']
+        )
+        self.assertEqual(self.favorited(), [])
+        self.assertEqual(self.counters(), [0, 0])
+        self.assertFalse(Favorite.objects.exists())
+        self.assertEqual(self.batch('delete', self.ids), ['missing'] * 2)
@@ -0,0 +1,57 @@
+from http import HTTPStatus
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe
+from users.models import Subscribe, User
+
+PASSWORD = 'counter-Pa55word'
+
+
+class CountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password=PASSWORD
+        )
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com', password=PASSWORD
+        )
+        self.client = APIClient()
+        token = Token.objects.create(user=self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_user_save_keeps_counters(self):
+        author = User.objects.get(id=self.author.id)
+        Recipe.objects.create(author=self.author, name='рецепт', text='т')
+        Subscribe.objects.create(user=self.reader, author=self.author)
+        author.first_name = 'Имя'
+        author.save()
+        author.refresh_from_db()
+        self.assertEqual(author.first_name, 'Имя')
+        self.assertEqual(author.recipes_count, 1)
+        self.assertEqual(author.followers_count, 1)
+
+    def test_recipe_save_keeps_counters(self):
+        recipe = Recipe.objects.create(
+            author=self.author, name='рецепт', text='т'
+        )
+        Favorite.objects.create(user=self.reader, recipe=recipe)
+        recipe.name = 'новое название'
+        recipe.save()
+        recipe.refresh_from_db()
+        self.assertEqual(recipe.name, 'новое название')
+        self.assertEqual(recipe.favorites_count, 1)
+
+    def test_set_password_keeps_recipes_count(self):
+        self.assertEqual(
+            self.client.get('/api/users/me/').status_code, HTTPStatus.OK
+        )
+        Recipe.objects.create(author=self.author, name='рецепт', text='т')
+        response = self.client.post('/api/users/set_password/', {
+            'current_password': PASSWORD, 'new_password': PASSWORD + '1'
+        })
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.author.refresh_from_db()
+        self.assertEqual(self.author.recipes_count, 1)
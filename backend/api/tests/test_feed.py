@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+
+from api.toggles import delete_existing
+from recipes.models import FeedEntry, Recipe
+from users.models import Subscribe, User
+
+
+@override_settings(FEED_FANOUT_LIMIT=1)
+class FeedFanOutTest(TransactionTestCase):
+    def setUp(self):
+        self.author, self.leaving, self.staying = (
+            User.objects.create_user(
+                username=name, email=f'{name}@example.com', password='x'
+            )
+            for name in ('author', 'leaving', 'staying')
+        )
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='рецепт', text='т'
+        )
+        for user in (self.leaving, self.staying):
+            Subscribe.objects.create(user=user, author=self.author)
+        FeedEntry.objects.all().delete()
+
+    def test_fan_out_runs_after_commit(self):
+        with transaction.atomic():
+            self.assertTrue(delete_existing(
+                Subscribe, user_id=self.leaving.id, author_id=self.author.id
+            ))
+            self.assertFalse(FeedEntry.objects.exists())
+        self.assertEqual(
+            list(FeedEntry.objects.values_list('user_id', 'recipe_id')),
+            [(self.staying.id, self.recipe.id)]
+        )
@@ -0,0 +1,49 @@
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from recipes.models import Recipe, Tag
+from users.models import User
+
+
+class TagFilterTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        self.breakfast, self.dinner = (
+            Tag.objects.create(name=slug, color=color, slug=slug)
+            for slug, color in (('breakfast', '#000001'),
+                                ('dinner', '#000002'))
+        )
+        self.recipe = Recipe.objects.create(
+            author=author, name='омлет', text='т'
+        )
+        self.recipe.tags.set([self.breakfast])
+
+    def recipes(self, query):
+        response = self.client.get(f'/api/recipes/?{query}')
+        self.assertEqual(response.status_code, HTTPStatus.OK, query)
+        return [recipe['id'] for recipe in response.json()['results']]
+
+    def test_known_tags(self):
+        self.assertEqual(self.recipes('tags=breakfast'), [self.recipe.id])
+        self.assertEqual(self.recipes('tags=dinner'), [])
+        self.assertEqual(
+            self.recipes('tags=dinner&tags=breakfast'), [self.recipe.id]
+        )
+
+    def test_unknown_tag_is_rejected(self):
+        for query in ('tags=unknown', 'tags=breakfast&tags=unknown'):
+            response = self.client.get(f'/api/recipes/?{query}')
+            self.assertEqual(
+                response.status_code, HTTPStatus.BAD_REQUEST, query
+            )
+            self.assertIn('tags', response.json())
+
+    def test_new_tag_is_accepted(self):
+        self.assertEqual(self.recipes('tags=breakfast'), [self.recipe.id])
+        Tag.objects.create(name='lunch', color='#000003', slug='lunch')
+        self.assertEqual(self.recipes('tags=lunch'), [])
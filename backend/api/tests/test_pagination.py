@@ -0,0 +1,42 @@
+from http import HTTPStatus
+
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Recipe
+from users.models import Subscribe, User
+
+
+class PaginationTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        Subscribe.objects.create(user=self.user, author=self.author)
+        Recipe.objects.create(author=self.author, name='рецепт', text='т')
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def test_subscriptions_ignore_ranked_ordering(self):
+        for query in ('?ordering=popular', '?ordering=popular&cursor='):
+            response = self.client.get(f'/api/users/subscriptions/{query}')
+            self.assertEqual(response.status_code, HTTPStatus.OK, query)
+            self.assertEqual(
+                [author['id'] for author in response.json()['results']],
+                [self.author.id]
+            )
+
+    def test_empty_cursor_is_first_page(self):
+        for url in (
+            '/api/recipes/?ordering=popular&cursor=',
+            '/api/recipes/?ordering=trending&cursor=%20',
+            '/api/recipes/feed/?cursor=',
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, HTTPStatus.OK, url)
+            self.assertEqual(len(response.json()['results']), 1, url)
@@ -0,0 +1,85 @@
+import random
+from http import HTTPStatus
+
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientsInRecipe, Recipe
+from recipes.pantry import PantryIndex, match_sql
+from users.models import User
+
+INGREDIENTS_COUNT = 30
+RECIPES_COUNT = 60
+SAMPLES = 30
+LIMIT = 20
+COVERAGES = (0, 0.5, 1)
+
+
+class PantryIndexTest(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.random = random.Random(0)
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'продукт {number}', measurement_unit='г')
+            for number in range(INGREDIENTS_COUNT)
+        )
+        self.ingredients = list(Ingredient.objects.filter(
+            name__startswith='продукт '
+        ).values_list('id', flat=True))
+        recipes = [
+            Recipe.objects.create(
+                author=self.author, name=f'рецепт {number}', text='т'
+            )
+            for number in range(RECIPES_COUNT)
+        ]
+        IngredientsInRecipe.objects.bulk_create(
+            IngredientsInRecipe(
+                recipe=recipe, ingredient_id=ingredient, amount=1
+            )
+            for recipe in recipes
+            for ingredient in self.random.sample(
+                self.ingredients, self.random.randint(1, 6)
+            )
+        )
+        self.recipes = [recipe.id for recipe in recipes]
+        self.index = PantryIndex()
+        self.client = APIClient()
+        token = Token.objects.create(user=self.author)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def assert_matches_sql(self):
+        for min_coverage in COVERAGES:
+            for _ in range(SAMPLES):
+                pantry = self.random.sample(
+                    self.ingredients, self.random.randint(1, 10)
+                )
+                with self.subTest(pantry=pantry, min_coverage=min_coverage):
+                    self.assertEqual(
+                        self.index.match(pantry, LIMIT, min_coverage),
+                        match_sql(pantry, LIMIT, min_coverage)
+                    )
+
+    def test_random_pantries_match_sql(self):
+        self.assert_matches_sql()
+
+    def test_edit_and_delete_are_replayed(self):
+        self.assert_matches_sql()
+        edited, deleted = self.recipes[:2]
+        response = self.client.patch(
+            f'/api/recipes/{edited}/',
+            {'ingredients': [
+                {'id': ingredient, 'amount': 1}
+                for ingredient in self.ingredients[:3]
+            ]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.delete(f'/api/recipes/{deleted}/')
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        self.assert_matches_sql()
+        self.assertEqual(self.index.dead, 2)
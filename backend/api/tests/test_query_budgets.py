@@ -0,0 +1,250 @@
+import shutil
+import tempfile
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Ingredient, IngredientsInRecipe, Recipe, Tag
+from recipes.similarity import rebuild_similar
+from users.models import Subscribe, User
+
+NAMESPACE = 'api'
+PASSWORD = 'budget-Pa55word'
+RECIPES_COUNT = 20
+MEDIA_ROOT = tempfile.mkdtemp()
+TRANSACTION_CONTROL = ('BEGIN', 'COMMIT', 'ROLLBACK')
+PNG = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAA'
+    'ADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+)
+
+Budget = namedtuple(
+    'Budget', 'name method queries kwargs data query',
+    defaults=(None, None, None)
+)
+
+
+def recipe_data(objects):
+    return {
+        'name': 'Рецепт для проверки',
+        'text': 'Описание',
+        'cooking_time': 10,
+        'image': PNG,
+        'tags': [tag.id for tag in objects['tags']],
+        'ingredients': [
+            {'id': ingredient.id, 'amount': 5}
+            for ingredient in objects['ingredients']
+        ],
+    }
+
+
+def recipe_ids(objects):
+    return {'ids': [recipe.id for recipe in objects['recipes']]}
+
+
+def pantry_query(objects):
+    return {'ingredients': ','.join(
+        str(ingredient.id) for ingredient in objects['ingredients']
+    )}
+
+
+def author_ids(objects):
+    return {'ids': [objects['other_author'].id]}
+
+
+QUERY_BUDGETS = (
+    Budget('api-root', 'get', 1),
+    Budget('login', 'post', 4, data=lambda objects: {
+        'email': objects['reader'].email, 'password': objects['password']
+    }),
+    Budget('user-list', 'get', 6),
+    Budget('user-list', 'post', 6, data=lambda objects: {
+        'email': 'budget_new@example.com', 'username': 'budget_new',
+        'first_name': 'Новый', 'last_name': 'Пользователь',
+        'password': objects['password'],
+    }),
+    Budget('user-me', 'get', 4),
+    Budget('user-detail', 'get', 5, kwargs={'id': 'author'}),
+    Budget('user-subscriptions', 'get', 7, query={'recipes_limit': 3}),
+    Budget('user-subscribe', 'post', 13, kwargs={'id': 'other_author'}),
+    Budget('user-subscribe', 'delete', 8, kwargs={'id': 'other_author'}),
+    Budget('user-subscribe-batch', 'post', 9, data=author_ids),
+    Budget('user-subscribe-batch', 'delete', 9, data=author_ids),
+    Budget('user-activation', 'post', 1, data={'uid': 'x', 'token': 'x'}),
+    Budget('user-resend-activation', 'post', 2, data=lambda objects: {
+        'email': objects['reader'].email
+    }),
+    Budget('user-reset-password', 'post', 2, data={
+        'email': 'nobody@example.com'
+    }),
+    Budget('user-reset-password-confirm', 'post', 1, data={
+        'uid': 'x', 'token': 'x', 'new_password': 'x'
+    }),
+    Budget('user-reset-username', 'post', 2, data={
+        'email': 'nobody@example.com'
+    }),
+    Budget('user-reset-username-confirm', 'post', 2, data={
+        'uid': 'x', 'token': 'x', 'new_email': 'x@example.com'
+    }),
+    Budget('user-set-username', 'post', 3, data=lambda objects: {
+        'current_password': objects['password'],
+        'new_email': 'budget_renamed@example.com',
+    }),
+    Budget('user-set-password', 'post', 2, data=lambda objects: {
+        'current_password': objects['password'],
+        'new_password': objects['password'],
+    }),
+    Budget('ingredient-list', 'get', 2),
+    Budget('ingredient-list', 'get', 2, query={'name': 'ин'}),
+    Budget('ingredient-detail', 'get', 2, kwargs={'pk': 'ingredient'}),
+    Budget('tag-list', 'get', 2),
+    Budget('tag-detail', 'get', 2, kwargs={'pk': 'tag'}),
+    Budget('recipe-list', 'get', 8),
+    Budget('recipe-list', 'get', 8, query={
+        'is_favorited': 1, 'is_in_shopping_cart': 1
+    }),
+    Budget('recipe-list', 'get', 8, query={'ordering': 'popular'}),
+    Budget('recipe-list', 'post', 24, data=recipe_data),
+    Budget('recipe-feed', 'get', 9),
+    Budget('recipe-pantry', 'get', 8, query=pantry_query),
+    Budget('recipe-similar', 'get', 8, kwargs={'pk': 'recipe'}),
+    Budget('recipe-detail', 'get', 7, kwargs={'pk': 'recipe'}),
+    Budget('recipe-detail', 'patch', 29, kwargs={'pk': 'own_recipe'},
+           data=recipe_data),
+    Budget('recipe-detail', 'delete', 16, kwargs={'pk': 'own_recipe'}),
+    Budget('recipe-favorite', 'post', 6, kwargs={'pk': 'recipe'}),
+    Budget('recipe-favorite', 'delete', 6, kwargs={'pk': 'recipe'}),
+    Budget('recipe-shopping-cart', 'post', 7, kwargs={'pk': 'recipe'}),
+    Budget('recipe-shopping-cart', 'delete', 8, kwargs={'pk': 'recipe'}),
+    Budget('recipe-favorite-batch', 'post', 7, data=recipe_ids),
+    Budget('recipe-favorite-batch', 'delete', 7, data=recipe_ids),
+    Budget('recipe-shopping-cart-batch', 'post', 8, data=recipe_ids),
+    Budget('recipe-download-shopping-cart', 'get', 2),
+    Budget('recipe-shopping-cart-summary', 'get', 2),
+    Budget('recipe-shopping-cart-batch', 'delete', 9, data=recipe_ids),
+    Budget('logout', 'post', 3),
+)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class QueryBudgetsTest(TransactionTestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.objects = self.seed()
+        token = Token.objects.create(user=self.objects['reader'])
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def seed(self):
+        reader, author, other_author = (
+            User.objects.create_user(
+                username=f'budget_{role}',
+                email=f'budget_{role}@example.com',
+                first_name=role, last_name=role, password=PASSWORD
+            )
+            for role in ('reader', 'author', 'other_author')
+        )
+        tags = [
+            Tag.objects.create(
+                name=f'budget {number}', color=f'#00000{number}',
+                slug=f'budget_{number}'
+            )
+            for number in range(3)
+        ]
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {number}', measurement_unit='г')
+            for number in range(5)
+        )
+        ingredients = list(
+            Ingredient.objects.filter(name__startswith='ингредиент ')
+        )
+        recipes = []
+        for number in range(RECIPES_COUNT):
+            recipe = Recipe.objects.create(
+                author=author, name=f'рецепт {number}', text='budget',
+                cooking_time=5
+            )
+            recipe.tags.set(tags)
+            recipes.append(recipe)
+        IngredientsInRecipe.objects.bulk_create(
+            IngredientsInRecipe(
+                recipe=recipe, ingredient=ingredient, amount=10
+            )
+            for recipe in recipes for ingredient in ingredients
+        )
+        Recipe.objects.create(
+            author=other_author, name='другой рецепт', text='budget'
+        )
+        own_recipe = Recipe.objects.create(
+            author=reader, name='свой рецепт', text='budget'
+        )
+        Subscribe.objects.create(user=reader, author=author)
+        rebuild_similar(settings.SIMILAR_RECIPES_COUNT)
+        return {
+            'reader': reader,
+            'author': author,
+            'other_author': other_author,
+            'password': PASSWORD,
+            'tags': tags,
+            'tag': tags[0],
+            'ingredients': ingredients,
+            'ingredient': ingredients[0],
+            'recipes': recipes[:5],
+            'recipe': recipes[0],
+            'own_recipe': own_recipe,
+        }
+
+    def request(self, budget):
+        kwargs = {
+            key: self.objects[value].pk
+            for key, value in (budget.kwargs or {}).items()
+        }
+        data = budget.data
+        if callable(data):
+            data = data(self.objects)
+        query = budget.query
+        if callable(query):
+            query = query(self.objects)
+        url = reverse(f'{NAMESPACE}:{budget.name}', kwargs=kwargs)
+        cache.clear()
+        with CaptureQueriesContext(connection) as context:
+            response = getattr(self.client, budget.method)(
+                url, data=data if data is not None else query,
+                format='json' if data is not None else None
+            )
+            if response.streaming:
+                b''.join(response.streaming_content)
+        return response, [
+            query['sql'] for query in context.captured_queries
+            if query['sql'].upper() not in TRANSACTION_CONTROL
+        ]
+
+    def test_routes_have_budgets(self):
+        resolver = get_resolver().namespace_dict[NAMESPACE][1]
+        names = {
+            name for name in resolver.reverse_dict if isinstance(name, str)
+        }
+        self.assertEqual(
+            sorted(names - {budget.name for budget in QUERY_BUDGETS}), []
+        )
+
+    def test_query_budgets(self):
+        for budget in QUERY_BUDGETS:
+            with self.subTest(name=budget.name, method=budget.method):
+                response, queries = self.request(budget)
+                self.assertLess(response.status_code, 500)
+                self.assertLessEqual(
+                    len(queries), budget.queries, '\n'.join(queries)
+                )
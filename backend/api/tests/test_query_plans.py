@@ -0,0 +1,60 @@
+import json
+import os
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.query_plans import (
+    analyze, capture_plans, compare_plans, plan_scenarios, plan_user
+)
+
+BASELINES = Path(__file__).resolve().parent / 'query_plans'
+MIN_ROWS = 500
+TOLERANCE = 0.5
+
+
+class QueryPlansTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        call_command(
+            'generate_fixtures', users=200, recipes=2000, stdout=StringIO()
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        token, _ = Token.objects.get_or_create(user=plan_user())
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        self.baseline = BASELINES / f'{connection.vendor}.json'
+
+    def test_plans_match_baseline(self):
+        analyze()
+        results = {
+            name: capture_plans(self.client, url)
+            for name, url in plan_scenarios().items()
+        }
+        if os.environ.get('UPDATE_QUERY_PLANS'):
+            self.baseline.write_text(json.dumps(
+                {
+                    'database': settings.DATABASES['default']['ENGINE'],
+                    'plans': results,
+                },
+                ensure_ascii=False, indent=2
+            ) + '\n', encoding='utf-8')
+        if not self.baseline.exists():
+            self.skipTest(
+                f'нет базовых планов {self.baseline.name}: '
+                'запустите тест с UPDATE_QUERY_PLANS=1'
+            )
+        baseline = json.loads(
+            self.baseline.read_text(encoding='utf-8')
+        )['plans']
+        self.assertEqual(sorted(results), sorted(baseline))
+        self.assertEqual(
+            compare_plans(results, baseline, MIN_ROWS, TOLERANCE), []
+        )
@@ -0,0 +1,56 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, RankingChange, Recipe, ShoppingCart
+from recipes.ranking import refresh_scores
+from users.models import User
+
+
+class RankingRefreshTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        self.recipes = [
+            Recipe.objects.create(author=self.user, name=name, text='т')
+            for name in ('первый', 'второй', 'третий')
+        ]
+        for recipe in self.recipes:
+            Favorite.objects.create(user=self.user, recipe=recipe)
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[2])
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def scores(self):
+        return list(Recipe.objects.filter(
+            id__in=[recipe.id for recipe in self.recipes]
+        ).order_by('id').values_list('popular_score', flat=True))
+
+    def test_incremental_refresh_includes_deleted_reactions(self):
+        now = timezone.now() + timedelta(minutes=1)
+        refresh_scores(full=True, now=now)
+        self.assertEqual(self.scores(), [1.0, 1.0, 3.0])
+        first, second, third = self.recipes
+        response = self.client.delete(f'/api/recipes/{first.id}/favorite/')
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        response = self.client.delete(
+            '/api/recipes/favorite/batch/', {'ids': [second.id]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.delete(
+            f'/api/recipes/{third.id}/shopping_cart/'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.NO_CONTENT)
+        refreshed, full = refresh_scores(
+            now=now + timedelta(minutes=1)
+        )
+        self.assertFalse(full)
+        self.assertEqual(self.scores(), [0.0, 0.0, 1.0])
+        self.assertFalse(RankingChange.objects.exists())
@@ -0,0 +1,92 @@
+from http import HTTPStatus
+
+from django.db.models import Q
+from django.test import TestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import (
+    Ingredient, IngredientsInRecipe, Recipe, SimilarRecipe, Tag
+)
+from recipes.similarity import rebuild_similar, update_similar
+from users.models import User
+
+
+class SimilarResetTest(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='x'
+        )
+        self.tags = [
+            Tag.objects.create(
+                name=f'тег {number}', color=f'#00000{number}',
+                slug=f'tag_{number}'
+            )
+            for number in range(2)
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(
+                name=f'продукт {number}', measurement_unit='г'
+            )
+            for number in range(3)
+        ]
+        self.recipes = [
+            Recipe.objects.create(author=self.user, name=name, text='т')
+            for name in ('первый', 'второй', 'третий')
+        ]
+        for recipe in self.recipes:
+            recipe.tags.set([self.tags[0]])
+            IngredientsInRecipe.objects.bulk_create(
+                IngredientsInRecipe(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+                for ingredient in self.ingredients[:2]
+            )
+        rebuild_similar(5)
+        self.recipe = self.recipes[0]
+        self.client = APIClient()
+        token = Token.objects.create(user=self.user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+    def patch(self, data):
+        response = self.client.patch(
+            f'/api/recipes/{self.recipe.id}/', {
+                'ingredients': [
+                    {'id': ingredient.id, 'amount': 1}
+                    for ingredient in self.ingredients[:2]
+                ],
+                **data
+            },
+            format='json'
+        )
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.recipe.refresh_from_db()
+
+    def similar_rows(self):
+        return SimilarRecipe.objects.filter(
+            Q(recipe=self.recipe) | Q(similar=self.recipe)
+        ).count()
+
+    def assert_reset(self):
+        self.assertFalse(self.recipe.similar_computed)
+        self.assertEqual(self.similar_rows(), 0)
+        self.assertEqual(SimilarRecipe.objects.count(), 2)
+
+    def test_text_change_keeps_similar(self):
+        self.patch({'cooking_time': 15, 'tags': [self.tags[0].id]})
+        self.assertTrue(self.recipe.similar_computed)
+        self.assertEqual(self.similar_rows(), 4)
+
+    def test_ingredient_change_resets_similar(self):
+        self.patch({'ingredients': [
+            {'id': self.ingredients[2].id, 'amount': 1}
+        ]})
+        self.assert_reset()
+        update_similar(5)
+        self.recipe.refresh_from_db()
+        self.assertTrue(self.recipe.similar_computed)
+        self.assertEqual(self.similar_rows(), 4)
+
+    def test_tag_change_resets_similar(self):
+        self.patch({'tags': [tag.id for tag in self.tags]})
+        self.assert_reset()
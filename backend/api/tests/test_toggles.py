@@ -0,0 +1,145 @@
+import threading
+from http import HTTPStatus
+
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite, Recipe, ShoppingCart
+from users.models import Subscribe, User
+
+THREADS = 8
+ROUNDS = 5
+
+
+class ToggleConcurrencyTest(TransactionTestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com', password='x'
+        )
+        self.users = [
+            User.objects.create_user(
+                username=f'user{number}', email=f'user{number}@example.com',
+                password='x'
+            )
+            for number in range(THREADS)
+        ]
+        self.recipe = Recipe.objects.create(
+            author=self.author, name='рецепт', text='текст'
+        )
+
+    def client_for(self, user):
+        client = APIClient()
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        return client
+
+    def run_parallel(self, requests):
+        clients = [self.client_for(user) for user, method, url in requests]
+        barrier = threading.Barrier(len(requests))
+        statuses = []
+        lock = threading.Lock()
+
+        def worker(client, method, url):
+            try:
+                barrier.wait()
+                for _ in range(ROUNDS):
+                    status = getattr(client, method)(url).status_code
+                    with lock:
+                        statuses.append(status)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=worker, args=(client, method, url))
+            for client, (user, method, url) in zip(clients, requests)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(statuses), len(requests) * ROUNDS)
+        self.assertNotIn(HTTPStatus.INTERNAL_SERVER_ERROR, statuses)
+        return statuses
+
+    def toggle_requests(self, user, url):
+        return [
+            (user, 'post' if number % 2 else 'delete', url)
+            for number in range(THREADS)
+        ]
+
+    def assert_recipe_counters(self):
+        self.recipe.refresh_from_db()
+        self.assertEqual(
+            self.recipe.favorites_count,
+            Favorite.objects.filter(recipe=self.recipe).count()
+        )
+        self.assertEqual(
+            self.recipe.cart_count,
+            ShoppingCart.objects.filter(recipe=self.recipe).count()
+        )
+
+    def test_parallel_favorite_toggles_of_one_user(self):
+        user = self.users[0]
+        self.run_parallel(self.toggle_requests(
+            user, f'/api/recipes/{self.recipe.id}/favorite/'
+        ))
+        self.assertLessEqual(
+            Favorite.objects.filter(user=user, recipe=self.recipe).count(), 1
+        )
+        self.assert_recipe_counters()
+
+    def test_parallel_favorites_of_many_users(self):
+        statuses = self.run_parallel([
+            (user, 'post', f'/api/recipes/{self.recipe.id}/favorite/')
+            for user in self.users
+        ])
+        self.assertEqual(statuses.count(HTTPStatus.CREATED), THREADS)
+        self.assertEqual(
+            Favorite.objects.filter(recipe=self.recipe).count(), THREADS
+        )
+        self.assert_recipe_counters()
+
+    def test_parallel_cart_toggles(self):
+        user = self.users[0]
+        requests = self.toggle_requests(
+            user, f'/api/recipes/{self.recipe.id}/shopping_cart/'
+        ) + [
+            (other, 'post', f'/api/recipes/{self.recipe.id}/shopping_cart/')
+            for other in self.users[1:]
+        ]
+        self.run_parallel(requests)
+        self.assertLessEqual(
+            ShoppingCart.objects.filter(
+                user=user, recipe=self.recipe
+            ).count(),
+            1
+        )
+        self.assertEqual(
+            ShoppingCart.objects.filter(
+                user__in=self.users[1:], recipe=self.recipe
+            ).count(),
+            THREADS - 1
+        )
+        self.assert_recipe_counters()
+
+    def test_parallel_subscribe_toggles(self):
+        user = self.users[0]
+        requests = self.toggle_requests(
+            user, f'/api/users/{self.author.id}/subscribe/'
+        ) + [
+            (other, 'post', f'/api/users/{self.author.id}/subscribe/')
+            for other in self.users[1:]
+        ]
+        self.run_parallel(requests)
+        self.assertLessEqual(
+            Subscribe.objects.filter(user=user, author=self.author).count(),
+            1
+        )
+        self.author.refresh_from_db()
+        self.assertEqual(
+            self.author.followers_count,
+            Subscribe.objects.filter(author=self.author).count()
+        )
+        self.assertGreaterEqual(self.author.followers_count, THREADS - 1)
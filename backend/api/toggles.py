@@ -0,0 +1,116 @@
+from django.db import connection, transaction
+from django.db.models.signals import post_delete, post_save
+
+from recipes.counters import recount
+from .membership import memberships_changed
+
+
+def columns(model, values):
+    return [model._meta.get_field(field).column for field in values]
+
+
+def delete_rows(model, **values):
+    quote = connection.ops.quote_name
+    conditions = []
+    params = []
+    for column, value in zip(columns(model, values), values.values()):
+        if isinstance(value, (list, set, tuple)):
+            conditions.append(
+                f'{quote(column)} IN ({", ".join(["%s"] * len(value))})'
+            )
+            params.extend(value)
+        else:
+            conditions.append(f'{quote(column)} = %s')
+            params.append(value)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {" AND ".join(conditions)}',
+            params
+        )
+        return cursor.rowcount
+
+
+def insert_ignore(model, **values):
+    quote = connection.ops.quote_name
+    instance = model(**values)
+    fields = [
+        field for field in model._meta.concrete_fields
+        if not field.primary_key
+    ]
+    names = ', '.join(quote(field.column) for field in fields)
+    placeholders = ', '.join(['%s'] * len(fields))
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {quote(model._meta.db_table)} ({names}) '
+            f'VALUES ({placeholders}) ON CONFLICT DO NOTHING',
+            [
+                field.get_db_prep_save(
+                    field.pre_save(instance, True), connection
+                )
+                for field in fields
+            ]
+        )
+        created = cursor.rowcount == 1
+        if created:
+            post_save.send(
+                sender=model, instance=instance, created=True,
+                update_fields=None, raw=False, using=connection.alias
+            )
+    return created
+
+
+def delete_existing(model, **values):
+    with transaction.atomic():
+        deleted = delete_rows(model, **values) > 0
+        if deleted:
+            post_delete.send(
+                sender=model, instance=model(**values),
+                using=connection.alias
+            )
+    return deleted
+
+
+def apply_batch(model, user, field, ids, add, excluded=(),
+                on_change=None):
+    targets = model._meta.get_field(field).related_model
+    target_column = f'{field}_id'
+    with transaction.atomic():
+        found = set(targets.objects.filter(id__in=ids).exclude(
+            id__in=excluded
+        ).values_list('id', flat=True))
+        present = set(model.objects.filter(
+            user=user, **{f'{target_column}__in': found}
+        ).values_list(target_column, flat=True))
+        if add:
+            changed = found - present
+            model.objects.bulk_create(
+                [
+                    model(user=user, **{target_column: target_id})
+                    for target_id in changed
+                ],
+                ignore_conflicts=True
+            )
+        else:
+            changed = present
+            if changed:
+                delete_rows(
+                    model, user_id=user.id, **{target_column: changed}
+                )
+        if changed:
+            recount(targets.objects.filter(id__in=changed))
+            memberships_changed(model, user.id)
+            if on_change is not None:
+                on_change(user.id, changed, add)
+    results = []
+    for target_id in ids:
+        if target_id in excluded:
+            status = 'forbidden'
+        elif target_id not in found:
+            status = 'not_found'
+        elif target_id in changed:
+            status = 'created' if add else 'deleted'
+        else:
+            status = 'exists' if add else 'missing'
+        results.append({'id': target_id, 'status': status})
+    return results
@@ -9,20 +9,76 @@ from http import HTTPStatus
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter
 from rest_framework.decorators import action
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db.models import F, Prefetch, Window, prefetch_related_objects
+from django.db.models.functions import RowNumber
+from django.conf import settings
+from django.http import StreamingHttpResponse
 
 from .permissions import IsAdminOrReadOnly, IsAuthorOrAdminOrReadOnly
 from users.models import User, Subscribe
+from recipes.cart import cart_changed
+from recipes.feed import follow, unfollow
+from recipes.ingredient_index import ingredient_index
+from recipes.pantry import match_recipes
+from recipes.ranking import reactions_deleted
 from recipes.models import (
-    Tag, Ingredient, Recipe, IngredientsInRecipe, Favorite, ShoppingCart
+    Tag, Ingredient, Recipe, IngredientsInRecipe, Favorite, ShoppingCart,
+    SimilarRecipe
 )
 from api.serializers import (
     UserSerializer, TagSerializer,
     IngredientSerializer, RecipeCreateSerializer, RecipeReadSerializer,
-    FavoriteCartSerializer, SubscribeSerializer
+    FavoriteCartSerializer, SubscribeSerializer, BatchSerializer,
+    PantrySerializer
 )
 from .filters import RecipeFilter, IngredientFilter
+from .pagination import (
+    FeedPagination, KeysetPagination, SubscriptionsKeysetPagination
+)
+from .toggles import apply_batch, delete_existing, insert_ignore
+from .shopping_list import (
+    EXPORTERS, GROUPS, TextExporter, shopping_cart_rows
+)
+
+
+def get_recipes_limit(request):
+    recipes_limit = request.query_params.get('recipes_limit', '')
+    if not recipes_limit.isdigit():
+        return None
+    return int(recipes_limit)
+
+
+def latest_recipes(authors, recipes_limit):
+    recipes = Recipe.objects.filter(author__in=authors)
+    if recipes_limit is None:
+        return recipes
+    ranked = recipes.order_by().annotate(
+        row_number=Window(
+            expression=RowNumber(),
+            partition_by=[F('author')],
+            order_by=[F('pub_date').desc(), F('id').desc()]
+        )
+    ).values('id', 'row_number')
+    sql, params = ranked.query.sql_with_params()
+    return Recipe.objects.extra(
+        where=[
+            f'{Recipe._meta.db_table}.id IN (SELECT ranked.id FROM ({sql}) '
+            f'ranked WHERE ranked.row_number <= %s)'
+        ],
+        params=(*params, recipes_limit)
+    )
+
+
+def with_latest_recipes(authors, request):
+    authors = list(authors)
+    prefetch_related_objects(authors, Prefetch(
+        'recipes',
+        queryset=latest_recipes(
+            [author.id for author in authors], get_recipes_limit(request)
+        ),
+        to_attr='latest_recipes'
+    ))
+    return authors
 
 
 class UserViewSet(DjoserUserViewSet):
@@ -32,14 +88,15 @@ class UserViewSet(DjoserUserViewSet):
     additional_serializer = SubscribeSerializer
 
     @action(
-        methods=['GET'], detail=False, permission_classes=(IsAuthenticated,)
+        methods=['GET'], detail=False, permission_classes=(IsAuthenticated,),
+        pagination_class=SubscriptionsKeysetPagination
     )
     def subscriptions(self, request):
-        user = request.user
-        authors = Subscribe.objects.filter(user=user)
-        page = self.paginate_queryset(authors)
+        page = self.paginate_queryset(
+            User.objects.filter(following__user=request.user)
+        )
         serializer = self.additional_serializer(
-            page,
+            with_latest_recipes(page, request),
             many=True,
             context={'request': request})
         return self.get_paginated_response(serializer.data)
@@ -55,14 +112,17 @@ class UserViewSet(DjoserUserViewSet):
                         'errors': 'Нельзя подписаться на самого себя'
                     }, status=HTTPStatus.BAD_REQUEST
                 )
-            if Subscribe.objects.filter(user=user, author=author).exists():
+            if not insert_ignore(Subscribe, user_id=user.id,
+                                 author_id=author.id):
                 return Response(
                     {'errors': 'Вы уже подписаны на данного пользователя'},
                     status=HTTPStatus.BAD_REQUEST
                 )
-            subscribe = Subscribe.objects.create(user=user, author=author)
             serializer = self.additional_serializer(
-                subscribe, context={'request': request}
+                with_latest_recipes(
+                    User.objects.filter(id=author.id), request
+                )[0],
+                context={'request': request}
             )
             return Response(serializer.data, status=HTTPStatus.CREATED)
         if request.method == 'DELETE':
@@ -71,15 +131,36 @@ class UserViewSet(DjoserUserViewSet):
                     {'errors': 'Пользователь и автор совпадают'},
                     status=HTTPStatus.BAD_REQUEST
                 )
-            follow = Subscribe.objects.filter(user=user, author=author)
-            if follow.exists():
-                follow.delete()
+            if delete_existing(Subscribe, user_id=user.id,
+                               author_id=author.id):
                 return Response(status=HTTPStatus.NO_CONTENT)
             return Response(
                 {'errors': 'Вы не подписаны на этого автора'},
                 status=HTTPStatus.BAD_REQUEST
             )
 
+    @action(
+        methods=['POST', 'DELETE'], detail=False, url_path='subscribe/batch',
+        permission_classes=(IsAuthenticated,)
+    )
+    def subscribe_batch(self, request):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        add = request.method == 'POST'
+        results = apply_batch(
+            Subscribe, request.user, 'author',
+            serializer.validated_data['ids'],
+            add=add,
+            excluded=(request.user.id,)
+        )
+        changed = [
+            result['id'] for result in results
+            if result['status'] in ('created', 'deleted')
+        ]
+        if changed:
+            (follow if add else unfollow)(request.user.id, changed)
+        return Response(results)
+
     @action(["get"], detail=False, permission_classes=(IsAuthenticated,))
     def me(self, request, *args, **kwargs):
         return super().me(request, *args, **kwargs)
@@ -101,6 +182,15 @@ class IngredientViewSet(viewsets.ModelViewSet):
     filterset_class = IngredientFilter
     search_fields = ('^name',)
 
+    def list(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if not name or 'search' in request.query_params:
+            return super().list(request, *args, **kwargs)
+        limit = request.query_params.get('limit', '')
+        return Response(ingredient_index.search(
+            name, int(limit) if limit.isdigit() else None
+        ))
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
@@ -109,6 +199,7 @@ class RecipeViewSet(viewsets.ModelViewSet):
                           IsAuthorOrAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    pagination_class = KeysetPagination
     additional_serializer = FavoriteCartSerializer
 
     def get_serializer_class(self):
@@ -116,27 +207,34 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeCreateSerializer
         return RecipeReadSerializer
 
+    def get_queryset(self):
+        if self.action == 'destroy':
+            return Recipe.objects.all()
+        return Recipe.objects.select_related('author').prefetch_related(
+            Prefetch(
+                'ingredientsinrecipe_set',
+                queryset=IngredientsInRecipe.objects.select_related(
+                    'ingredient'
+                )
+            ),
+            'tags',
+        )
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
     def add_recipe(self, model, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
-        if model.objects.filter(
-                recipe=recipe, user=request.user
-        ).exists():
+        if not insert_ignore(model, recipe_id=recipe.id,
+                             user_id=request.user.id):
             return Response(status=HTTPStatus.BAD_REQUEST)
-        model.objects.create(recipe=recipe, user=request.user)
         serializer = FavoriteCartSerializer(recipe)
         return Response(data=serializer.data, status=HTTPStatus.CREATED)
 
     def delete_recipe(self, model, request, pk):
         recipe = get_object_or_404(Recipe, id=pk)
-        if model.objects.filter(
-                user=request.user, recipe=recipe
-        ).exists():
-            model.objects.filter(
-                user=request.user, recipe=recipe
-            ).delete()
+        if delete_existing(model, user_id=request.user.id,
+                           recipe_id=recipe.id):
             return Response(status=HTTPStatus.NO_CONTENT)
         return Response(status=HTTPStatus.BAD_REQUEST)
 
@@ -162,39 +260,146 @@ class RecipeViewSet(viewsets.ModelViewSet):
         if request.method == 'DELETE':
             return self.delete_recipe(ShoppingCart, request, kwargs.get('pk'))
 
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=(IsAuthenticated,),
+        pagination_class=FeedPagination
+    )
+    def feed(self, request):
+        recipe_ids = self.paginator.paginate_feed(request.user, request)
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        serializer = RecipeReadSerializer(
+            [recipes[recipe_id] for recipe_id in recipe_ids
+             if recipe_id in recipes],
+            many=True,
+            context={'request': request}
+        )
+        return self.paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True, methods=['GET'])
+    def similar(self, request, **kwargs):
+        limit = request.query_params.get('limit', '')
+        limit = int(limit) if limit.isdigit() else (
+            settings.SIMILAR_RECIPES_COUNT
+        )
+        recipe_ids = list(SimilarRecipe.objects.filter(
+            recipe_id=kwargs.get('pk')
+        ).order_by('-score').values_list('similar_id', flat=True)[:limit])
+        if not recipe_ids:
+            get_object_or_404(Recipe, id=kwargs.get('pk'))
+        recipes = self.get_queryset().in_bulk(recipe_ids)
+        serializer = RecipeReadSerializer(
+            [recipes[recipe_id] for recipe_id in recipe_ids
+             if recipe_id in recipes],
+            many=True,
+            context={'request': request}
+        )
+        return Response(serializer.data)
+
+    @action(detail=False, methods=['GET'])
+    def pantry(self, request):
+        params = request.query_params
+        data = {
+            key: params[key] for key in ('min_coverage', 'limit')
+            if key in params
+        }
+        data['ingredients'] = [
+            value for item in params.getlist('ingredients')
+            for value in item.split(',') if value
+        ]
+        pantry = PantrySerializer(data=data)
+        pantry.is_valid(raise_exception=True)
+        matches = match_recipes(
+            pantry.validated_data['ingredients'],
+            pantry.validated_data['limit'],
+            pantry.validated_data['min_coverage']
+        )
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, matched, total in matches]
+        )
+        matches = [match for match in matches if match[0] in recipes]
+        data = RecipeReadSerializer(
+            [recipes[recipe_id] for recipe_id, matched, total in matches],
+            many=True,
+            context={'request': request}
+        ).data
+        for item, (recipe_id, matched, total) in zip(data, matches):
+            item['coverage'] = round(matched / total, 3)
+            item['missing_count'] = total - matched
+        return Response(data)
+
+    def recipes_batch(self, model, request, on_change=None):
+        serializer = BatchSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        results = apply_batch(
+            model, request.user, 'recipe',
+            serializer.validated_data['ids'],
+            add=request.method == 'POST',
+            on_change=on_change
+        )
+        deleted = [
+            result['id'] for result in results
+            if result['status'] == 'deleted'
+        ]
+        if deleted:
+            reactions_deleted(deleted)
+        return Response(results)
+
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        url_path='favorite/batch',
+        permission_classes=(IsAuthenticated,)
+    )
+    def favorite_batch(self, request):
+        return self.recipes_batch(Favorite, request)
+
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        url_path='shopping_cart/batch',
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_batch(self, request):
+        return self.recipes_batch(
+            ShoppingCart, request, on_change=cart_changed
+        )
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        url_path='shopping_cart/summary',
+        permission_classes=(IsAuthenticated,)
+    )
+    def shopping_cart_summary(self, request):
+        return Response([
+            {'name': name, 'measurement_unit': unit, 'amount': amount}
+            for group, name, unit, amount in shopping_cart_rows(request.user)
+        ])
+
     @action(
         methods=['GET'],
         detail=False,
         permission_classes=(IsAuthenticated,)
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        filename = f'{user.username}_shopping_list.txt'
-        ingredients = IngredientsInRecipe.objects.filter(
-            recipe__shopping_cart__user=user
-        ).values_list(
-            'ingredient__name',
-            'ingredient__measurement_unit'
-        ).order_by(
-            'ingredient__name'
-        ).annotate(
-            ingredient_sum=Sum('amount')
+        exporter = EXPORTERS.get(
+            request.query_params.get('file_format', TextExporter.extension)
         )
-        shopping_cart_tmp = {}
-        for ingredient in ingredients:
-            name = ingredient[0]
-            shopping_cart_tmp[name] = {
-                'amount': ingredient[2],
-                'measurement_unit': ingredient[1]
-            }
-            shopping_cart = ["Список продуктов к покупке:\n"]
-            for key, value in shopping_cart_tmp.items():
-                shopping_cart.append(f'{key} - {value["amount"]} '
-                                     f'{value["measurement_unit"]}\n')
-        response = HttpResponse(
-            shopping_cart, content_type='text.txt; charset=utf-8'
+        group_by = request.query_params.get('group_by')
+        if exporter is None or (group_by and group_by not in GROUPS):
+            return Response(
+                {'errors': 'Неподдерживаемый формат списка покупок'},
+                status=HTTPStatus.BAD_REQUEST
+            )
+        exporter = exporter()
+        response = StreamingHttpResponse(
+            exporter.render(shopping_cart_rows(request.user, group_by)),
+            content_type=exporter.content_type
         )
         response['Content-Disposition'] = (
-            f'attachment; filename={filename}.txt'
+            f'attachment; filename={request.user.username}'
+            f'_shopping_list.{exporter.extension}'
         )
         return response
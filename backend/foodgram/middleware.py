@@ -0,0 +1,111 @@
+import json
+import logging
+import time
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.db import connections
+
+logger = logging.getLogger('foodgram.timing')
+current_timings = ContextVar('current_timings', default=None)
+
+
+class Timings:
+    def __init__(self):
+        self.durations = defaultdict(float)
+        self.active = set()
+        self.queries = 0
+
+    def record_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.durations['db'] += time.perf_counter() - start
+
+
+@contextmanager
+def timed(name):
+    timings = current_timings.get()
+    if timings is None or name in timings.active:
+        yield
+        return
+    timings.active.add(name)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.durations[name] += time.perf_counter() - start
+        timings.active.discard(name)
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = Timings()
+        token = current_timings.set(timings)
+        start = time.perf_counter()
+        wrappers = ExitStack()
+        for connection in connections.all():
+            wrappers.enter_context(
+                connection.execute_wrapper(timings.record_query)
+            )
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            wrappers.close()
+            raise
+        finally:
+            current_timings.reset(token)
+        view_start = getattr(request, 'view_started_at', None)
+        if view_start is not None:
+            timings.durations['view'] = time.perf_counter() - view_start
+        response['Server-Timing'] = ', '.join(
+            [f'db;dur={timings.durations["db"] * 1000:.1f};'
+             f'desc="{timings.queries} queries"']
+            + [
+                f'{name};dur={timings.durations[name] * 1000:.1f}'
+                for name in ('serializer', 'view')
+                if name in timings.durations
+            ]
+            + [
+                f'total;dur={(time.perf_counter() - start) * 1000:.1f}'
+            ]
+        )
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, request, response, timings,
+                wrappers, start
+            )
+        else:
+            self.finish(request, response, timings, wrappers, start)
+        return response
+
+    def stream(self, content, request, response, timings, wrappers, start):
+        try:
+            yield from content
+        finally:
+            self.finish(request, response, timings, wrappers, start)
+
+    def finish(self, request, response, timings, wrappers, start):
+        wrappers.close()
+        logger.debug(json.dumps({
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'streaming': response.streaming,
+            'queries': timings.queries,
+            'db_ms': round(timings.durations['db'] * 1000, 1),
+            'serializer_ms': round(
+                timings.durations.get('serializer', 0) * 1000, 1
+            ),
+            'view_ms': round(timings.durations.get('view', 0) * 1000, 1),
+            'total_ms': round((time.perf_counter() - start) * 1000, 1),
+        }))
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.view_started_at = time.perf_counter()
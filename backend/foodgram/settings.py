@@ -54,6 +54,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'foodgram.middleware.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -95,10 +96,27 @@ DATABASES = {
         'PASSWORD': os.getenv('POSTGRES_PASSWORD', default=''),
         # 'HOST': os.getenv('DB_HOST', default='db'),
         'HOST': os.getenv('DB_HOST', default='localhost'),
-        'PORT': os.getenv('DB_PORT', default=5432)
+        'PORT': os.getenv('DB_PORT', default=5432),
+        'TEST': {'NAME': os.getenv('DB_TEST_NAME')},
     }
 }
 
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default=''),
+    }
+}
+
+MEMBERSHIP_CACHE_TIMEOUT = int(os.getenv('MEMBERSHIP_CACHE_TIMEOUT', 60 * 60))
+
+AUTH_TOKEN_CACHE_TIMEOUT = int(os.getenv('AUTH_TOKEN_CACHE_TIMEOUT', 60))
+
+TAG_BITS_CACHE_TIMEOUT = int(os.getenv('TAG_BITS_CACHE_TIMEOUT', 5 * 60))
+
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
 
@@ -123,13 +141,37 @@ REST_FRAMEWORK = {
     ],
 
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 6,
 }
 
+PAGINATION_PAGE_COMPAT = bool(int(os.getenv('PAGINATION_PAGE_COMPAT', '1')))
+
+BATCH_MAX_SIZE = int(os.getenv('BATCH_MAX_SIZE', 100))
+
+FEED_FANOUT_LIMIT = int(os.getenv('FEED_FANOUT_LIMIT', 1000))
+
+FEED_BACKFILL_SIZE = int(os.getenv('FEED_BACKFILL_SIZE', 50))
+
+FEED_MAX_LENGTH = int(os.getenv('FEED_MAX_LENGTH', 1000))
+
+RANKING_POPULAR_DAYS = int(os.getenv('RANKING_POPULAR_DAYS', 7))
+
+RANKING_HALF_LIFE_HOURS = float(os.getenv('RANKING_HALF_LIFE_HOURS', 24))
+
+SIMILAR_RECIPES_COUNT = int(os.getenv('SIMILAR_RECIPES_COUNT', 20))
+
+PANTRY_INDEX_ENABLED = bool(int(os.getenv('PANTRY_INDEX_ENABLED', '1')))
+
+PANTRY_MAX_INGREDIENTS = int(os.getenv('PANTRY_MAX_INGREDIENTS', 100))
+
+PANTRY_MIN_COVERAGE = float(os.getenv('PANTRY_MIN_COVERAGE', 0.5))
+
+PANTRY_RESULTS_LIMIT = int(os.getenv('PANTRY_RESULTS_LIMIT', 20))
+
 DJOSER = {
     'HIDE_USERS': False,
     'PERMISSIONS': {
@@ -166,3 +208,24 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'plain': {'format': '%(message)s'},
+    },
+    'handlers': {
+        'timing': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'plain',
+        },
+    },
+    'loggers': {
+        'foodgram.timing': {
+            'handlers': ['timing'],
+            'level': os.getenv('TIMING_LOG_LEVEL', 'INFO'),
+            'propagate': False,
+        },
+    },
+}
@@ -1,6 +1,10 @@
 from django.contrib import admin
 
+from .cart import recipes_updating
 from .models import Ingredient, Recipe, Tag, IngredientsInRecipe
+from .pantry import recipes_changed
+from .search import update_search_index
+from .similarity import reset_similar
 
 
 @admin.register(Ingredient)
@@ -17,11 +21,50 @@ class TagsAdmin(admin.ModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'text',)
+    list_display = (
+        'name', 'author', 'text', 'favorites_count', 'cart_count',
+        'popular_score', 'trending_score',
+    )
     list_filter = ('author', 'name', 'tags',)
 
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        update_search_index([form.instance.id])
+        recipes_changed([form.instance.id])
+        if change and ('tags' in form.changed_data or any(
+            formset.has_changed() for formset in formsets
+        )):
+            reset_similar([form.instance.id])
+
 
 @admin.register(IngredientsInRecipe)
 class IngredientsInRecipeAdmin(admin.ModelAdmin):
     list_display = ('id', 'recipe', 'ingredient', 'amount',)
     list_filter = ('recipe',)
+
+    def save_model(self, request, obj, form, change):
+        recipe_ids = {obj.recipe_id}
+        if change:
+            recipe_ids.add(form.initial['recipe'])
+        self.update_recipes(
+            list(recipe_ids), super().save_model, request, obj, form, change
+        )
+
+    def delete_model(self, request, obj):
+        self.update_recipes(
+            [obj.recipe_id], super().delete_model, request, obj
+        )
+
+    def delete_queryset(self, request, queryset):
+        self.update_recipes(
+            list(set(queryset.values_list('recipe_id', flat=True))),
+            super().delete_queryset, request, queryset
+        )
+
+    @staticmethod
+    def update_recipes(recipe_ids, change, *args):
+        with recipes_updating(recipe_ids):
+            change(*args)
+        update_search_index(recipe_ids)
+        recipes_changed(recipe_ids)
+        reset_similar(recipe_ids)
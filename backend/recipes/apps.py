@@ -1,6 +1,47 @@
 from django.apps import AppConfig
+from django.db.models.signals import (
+    m2m_changed, post_delete, post_save, pre_delete
+)
 
 
 class RecipesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recipes'
+
+    def ready(self):
+        from users.models import Subscribe
+        from .cart import (
+            cart_item_deleted, cart_item_saved, cart_recipe_deleted,
+            cart_recipe_deleting
+        )
+        from .counters import COUNTERS, counter_created, counter_deleted
+        from .feed import (
+            recipe_created, subscription_created, subscription_deleted
+        )
+        from .ingredient_index import invalidate
+        from .pantry import recipe_deleted
+        from .models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+        from .ranking import reaction_deleted
+        from .tag_mask import (
+            invalidate_tag_bits, tag_deleted, tag_deleting, tags_changed
+        )
+
+        post_save.connect(invalidate, sender=Ingredient)
+        post_delete.connect(invalidate, sender=Ingredient)
+        for model in COUNTERS:
+            post_save.connect(counter_created, sender=model)
+            post_delete.connect(counter_deleted, sender=model)
+        m2m_changed.connect(tags_changed, sender=Recipe.tags.through)
+        post_save.connect(invalidate_tag_bits, sender=Tag)
+        pre_delete.connect(tag_deleting, sender=Tag)
+        post_delete.connect(tag_deleted, sender=Tag)
+        post_save.connect(recipe_created, sender=Recipe)
+        post_save.connect(subscription_created, sender=Subscribe)
+        post_delete.connect(subscription_deleted, sender=Subscribe)
+        post_delete.connect(recipe_deleted, sender=Recipe)
+        for model in (Favorite, ShoppingCart):
+            post_delete.connect(reaction_deleted, sender=model)
+        post_save.connect(cart_item_saved, sender=ShoppingCart)
+        post_delete.connect(cart_item_deleted, sender=ShoppingCart)
+        pre_delete.connect(cart_recipe_deleting, sender=Recipe)
+        post_delete.connect(cart_recipe_deleted, sender=Recipe)
@@ -0,0 +1,145 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import connection
+from django.db.models import Count, IntegerField, Sum, Value
+
+from .models import CartIngredient, IngredientsInRecipe
+
+COLUMNS = ('user_id', 'ingredient_id', 'amount', 'recipes_count')
+
+deleting_recipes = ContextVar('deleting_recipes', default=frozenset())
+
+
+def totals(rows, sign):
+    return rows.annotate(
+        total=Sum('amount') * sign,
+        recipes=Count('id') * sign
+    )
+
+
+def carted_rows(sign, **filters):
+    return totals(IngredientsInRecipe.objects.filter(
+        recipe__shopping_cart__isnull=False, **filters
+    ).values('recipe__shopping_cart__user', 'ingredient'), sign)
+
+
+def user_rows(user_id, recipe_ids, sign):
+    return totals(IngredientsInRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('ingredient').annotate(
+        cart_user=Value(user_id, output_field=IntegerField())
+    ), sign)
+
+
+def upsert(rows, columns=COLUMNS):
+    quote = connection.ops.quote_name
+    table = quote(CartIngredient._meta.db_table)
+    sql, params = rows.query.sql_with_params()
+    names = ', '.join(quote(column) for column in columns)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({names}) {sql} '
+            f'ON CONFLICT ({quote("user_id")}, {quote("ingredient_id")}) '
+            f'DO UPDATE SET '
+            f'{quote("amount")} = {table}.{quote("amount")} '
+            f'+ excluded.{quote("amount")}, '
+            f'{quote("recipes_count")} = {table}.{quote("recipes_count")} '
+            f'+ excluded.{quote("recipes_count")}',
+            params
+        )
+
+
+def remove_empty(**filters):
+    CartIngredient.objects.filter(
+        recipes_count__lte=0, **filters
+    )._raw_delete(connection.alias)
+
+
+def cart_changed(user_id, recipe_ids, add):
+    recipe_ids = [
+        recipe_id for recipe_id in recipe_ids
+        if recipe_id not in deleting_recipes.get()
+    ]
+    if not recipe_ids:
+        return
+    upsert(
+        user_rows(user_id, recipe_ids, 1 if add else -1),
+        ('ingredient_id', 'user_id', 'amount', 'recipes_count')
+    )
+    if not add:
+        remove_empty(user_id=user_id)
+
+
+def recipes_removed(recipe_ids):
+    if not recipe_ids:
+        return
+    upsert(carted_rows(-1, recipe_id__in=recipe_ids))
+    remove_empty(ingredient__in=IngredientsInRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('ingredient'))
+
+
+def recipes_added(recipe_ids):
+    if not recipe_ids:
+        return
+    upsert(carted_rows(1, recipe_id__in=recipe_ids))
+
+
+@contextmanager
+def recipes_updating(recipe_ids):
+    recipes_removed(recipe_ids)
+    yield
+    recipes_added(recipe_ids)
+
+
+def rebuild_carts(user_ids=None):
+    queryset = CartIngredient.objects.all()
+    filters = {}
+    if user_ids is not None:
+        if not user_ids:
+            return
+        queryset = queryset.filter(user_id__in=user_ids)
+        filters['recipe__shopping_cart__user_id__in'] = user_ids
+    queryset._raw_delete(connection.alias)
+    upsert(carted_rows(1, **filters))
+
+
+def live_totals(user_ids):
+    return {
+        (user_id, ingredient_id): (amount, recipes_count)
+        for user_id, ingredient_id, amount, recipes_count in carted_rows(
+            1, recipe__shopping_cart__user_id__in=user_ids
+        ).values_list(
+            'recipe__shopping_cart__user', 'ingredient', 'total', 'recipes'
+        )
+    }
+
+
+def stored_totals(user_ids):
+    return {
+        (user_id, ingredient_id): (amount, recipes_count)
+        for user_id, ingredient_id, amount, recipes_count in (
+            CartIngredient.objects.filter(
+                user_id__in=user_ids
+            ).values_list(*COLUMNS)
+        )
+    }
+
+
+def cart_item_saved(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        cart_changed(instance.user_id, [instance.recipe_id], add=True)
+
+
+def cart_item_deleted(sender, instance, **kwargs):
+    cart_changed(instance.user_id, [instance.recipe_id], add=False)
+
+
+def cart_recipe_deleting(sender, instance, **kwargs):
+    recipes_removed([instance.id])
+    deleting_recipes.set(deleting_recipes.get() | {instance.id})
+
+
+def cart_recipe_deleted(sender, instance, **kwargs):
+    deleting_recipes.set(deleting_recipes.get() - {instance.id})
@@ -0,0 +1,54 @@
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+from users.models import Subscribe, User
+from .models import Favorite, Recipe, ShoppingCart
+
+COUNTERS = {
+    Favorite: (Recipe, 'recipe_id', 'favorites_count'),
+    ShoppingCart: (Recipe, 'recipe_id', 'cart_count'),
+    Recipe: (User, 'author_id', 'recipes_count'),
+    Subscribe: (User, 'author_id', 'followers_count'),
+}
+
+
+def change_counter(sender, instance, delta):
+    model, field, counter = COUNTERS[sender]
+    pk = getattr(instance, field)
+    if pk is None:
+        return
+    queryset = model.objects.filter(pk=pk)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{counter}__gte': -delta})
+    queryset.update(**{counter: F(counter) + delta})
+
+
+def counter_created(sender, instance, created, **kwargs):
+    if created:
+        change_counter(sender, instance, 1)
+
+
+def counter_deleted(sender, instance, **kwargs):
+    change_counter(sender, instance, -1)
+
+
+def count_subquery(source, field):
+    return Coalesce(
+        Subquery(
+            source.objects.filter(
+                **{field: OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=Count('pk')
+            ).values('total')
+        ),
+        Value(0)
+    )
+
+
+def recount(queryset):
+    counters = {
+        counter: count_subquery(source, field.replace('_id', ''))
+        for source, (model, field, counter) in COUNTERS.items()
+        if model is queryset.model
+    }
+    return queryset.update(**counters)
@@ -0,0 +1,135 @@
+import heapq
+from functools import partial
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from users.models import Subscribe, User
+from .models import FeedEntry, Recipe
+
+
+def followed_celebrities(user_id):
+    return Subscribe.objects.filter(
+        user_id=user_id,
+        author__followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).values_list('author_id', flat=True)
+
+
+def recent_recipes(author_id):
+    return list(Recipe.objects.filter(
+        author_id=author_id,
+        author__followers_count__lte=settings.FEED_FANOUT_LIMIT
+    ).order_by('-pub_date', '-id').values_list(
+        'id', 'pub_date'
+    )[:settings.FEED_BACKFILL_SIZE])
+
+
+def follow(user_id, author_ids, recent=None):
+    recent = {} if recent is None else recent
+    entries = []
+    for author_id in author_ids:
+        if author_id not in recent:
+            recent[author_id] = recent_recipes(author_id)
+        entries.extend(
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id, author_id=author_id,
+                pub_date=pub_date
+            )
+            for recipe_id, pub_date in recent[author_id]
+        )
+    FeedEntry.objects.bulk_create(entries, ignore_conflicts=True)
+    return len(entries)
+
+
+def fan_out(author_id):
+    recent = recent_recipes(author_id)
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                user_id=user_id, recipe_id=recipe_id, author_id=author_id,
+                pub_date=pub_date
+            )
+            for user_id in Subscribe.objects.filter(
+                author_id=author_id
+            ).values_list('user_id', flat=True).iterator()
+            for recipe_id, pub_date in recent
+        ],
+        batch_size=1000,
+        ignore_conflicts=True
+    )
+
+
+def unfollow(user_id, author_ids):
+    FeedEntry.objects.filter(
+        user_id=user_id, author_id__in=author_ids
+    ).delete()
+    for author_id in User.objects.filter(
+        id__in=author_ids, followers_count=settings.FEED_FANOUT_LIMIT
+    ).values_list('id', flat=True):
+        transaction.on_commit(partial(fan_out, author_id))
+
+
+def recipe_created(sender, instance, created, raw=False, **kwargs):
+    if not created or raw or instance.author_id is None:
+        return
+    followers = Subscribe.objects.filter(
+        author_id=instance.author_id,
+        author__followers_count__lte=settings.FEED_FANOUT_LIMIT
+    ).values_list('user_id', flat=True)
+    FeedEntry.objects.bulk_create(
+        [
+            FeedEntry(
+                user_id=user_id, recipe_id=instance.id,
+                author_id=instance.author_id, pub_date=instance.pub_date
+            )
+            for user_id in followers
+        ],
+        ignore_conflicts=True
+    )
+
+
+def subscription_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        follow(instance.user_id, [instance.author_id])
+
+
+def subscription_deleted(sender, instance, **kwargs):
+    unfollow(instance.user_id, [instance.author_id])
+
+
+def after(queryset, id_field, position):
+    if position is None:
+        return queryset
+    pub_date, recipe_id = position
+    return queryset.filter(
+        Q(pub_date__lt=pub_date)
+        | Q(pub_date=pub_date, **{f'{id_field}__lt': recipe_id})
+    )
+
+
+def feed_page(user_id, limit, position=None):
+    sources = [after(
+        FeedEntry.objects.filter(user_id=user_id).order_by(
+            '-pub_date', '-recipe_id'
+        ).values_list('pub_date', 'recipe_id'),
+        'recipe_id', position
+    )[:limit + 1]]
+    celebrities = list(followed_celebrities(user_id))
+    if celebrities:
+        sources.append(after(
+            Recipe.objects.filter(author_id__in=celebrities).order_by(
+                '-pub_date', '-id'
+            ).values_list('pub_date', 'id'),
+            'id', position
+        )[:limit + 1])
+    page = []
+    seen = set()
+    for pub_date, recipe_id in heapq.merge(*sources, reverse=True):
+        if recipe_id in seen:
+            continue
+        seen.add(recipe_id)
+        page.append((pub_date, recipe_id))
+        if len(page) > limit:
+            break
+    return page
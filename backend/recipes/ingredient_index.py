@@ -0,0 +1,69 @@
+from bisect import bisect_left
+from threading import Lock
+
+from django.core.cache import cache
+
+from .models import Ingredient
+
+VERSION_KEY = 'ingredient_index_version'
+
+
+def invalidate(**kwargs):
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, 1, timeout=None)
+
+
+class IngredientIndex:
+    def __init__(self):
+        self.version = None
+        self.data = ([], [])
+        self.lock = Lock()
+
+    def build(self, version):
+        rows = sorted(
+            (name.casefold(), pk, name, unit)
+            for pk, name, unit in Ingredient.objects.values_list(
+                'id', 'name', 'measurement_unit'
+            ).order_by()
+        )
+        self.data = (
+            [row[0] for row in rows],
+            [
+                {'id': pk, 'name': name, 'measurement_unit': unit}
+                for _, pk, name, unit in rows
+            ]
+        )
+        self.version = version
+
+    def refresh(self):
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            invalidate()
+            version = cache.get(VERSION_KEY)
+        if version is None or self.version != version:
+            with self.lock:
+                if version is None or self.version != version:
+                    self.build(version)
+
+    def search(self, query, limit=None):
+        self.refresh()
+        keys, items = self.data
+        query = query.casefold()
+        start = bisect_left(keys, query)
+        end = start
+        while end < len(keys) and keys[end].startswith(query):
+            if limit is not None and end - start >= limit:
+                return items[start:end]
+            end += 1
+        result = items[start:end]
+        for position, key in enumerate(keys):
+            if limit is not None and len(result) >= limit:
+                break
+            if query in key and not key.startswith(query):
+                result.append(items[position])
+        return result
+
+
+ingredient_index = IngredientIndex()
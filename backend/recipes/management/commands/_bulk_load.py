@@ -0,0 +1,108 @@
+import csv
+import json
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+DATA_DIR = os.path.join(os.path.dirname(settings.BASE_DIR), 'data')
+
+
+def iter_json_array(file, chunk_size=65536):
+    decoder = json.JSONDecoder()
+    buffer = file.read(chunk_size).lstrip()
+    if not buffer.startswith('['):
+        raise CommandError('Ожидался JSON-массив')
+    buffer = buffer[1:]
+    while True:
+        buffer = buffer.lstrip().lstrip(',').lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                raise CommandError('Файл JSON оборван')
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+class BulkLoadCommand(BaseCommand):
+    model = None
+    fields = ()
+    key_fields = ()
+    default_file = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?',
+            default=os.path.join(DATA_DIR, self.default_file)
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def read(self, path):
+        with open(path, encoding='utf-8', newline='') as file:
+            if path.endswith('.json'):
+                for item in iter_json_array(file):
+                    yield tuple(item[field] for field in self.fields)
+            else:
+                for row in csv.reader(file):
+                    if row:
+                        yield tuple(row[:len(self.fields)])
+
+    def key(self, values):
+        return tuple(values[field] for field in self.key_fields)
+
+    def flush(self, create, update):
+        self.model.objects.bulk_create(create, ignore_conflicts=True)
+        update_fields = [
+            field for field in self.fields if field not in self.key_fields
+        ]
+        if update and update_fields:
+            self.model.objects.bulk_update(update, update_fields)
+
+    def handle(self, *args, path, batch_size, **options):
+        if not os.path.exists(path):
+            raise CommandError(f'Файл {path} не найден')
+        start = time.perf_counter()
+        existing = {
+            self.key(values): values
+            for values in self.model.objects.values('pk', *self.fields)
+        }
+        seen = set()
+        read = created = updated = 0
+        create, update = [], []
+        with transaction.atomic():
+            for row in self.read(path):
+                read += 1
+                values = dict(zip(self.fields, (
+                    value.strip() for value in row
+                )))
+                key = self.key(values)
+                if key in seen:
+                    continue
+                seen.add(key)
+                stored = existing.get(key)
+                if stored is None:
+                    create.append(self.model(**values))
+                elif any(stored[field] != values[field] for field in values):
+                    update.append(self.model(pk=stored['pk'], **values))
+                if len(create) + len(update) >= batch_size:
+                    created += len(create)
+                    updated += len(update)
+                    self.flush(create, update)
+                    create, update = [], []
+            created += len(create)
+            updated += len(update)
+            self.flush(create, update)
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Прочитано {read}, добавлено {created}, обновлено {updated}, '
+            f'пропущено {read - created - updated} за {elapsed:.2f} с '
+            f'({read / max(elapsed, 1e-9):.0f} строк/с)'
+        ))
@@ -0,0 +1,39 @@
+import time
+from itertools import groupby
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.feed import follow
+from users.models import Subscribe
+
+
+class Command(BaseCommand):
+    help = 'Заполнение ленты подписок из существующих подписок и рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, nargs='*')
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, users, batch_size, **options):
+        start = time.perf_counter()
+        subscriptions = Subscribe.objects.order_by('user_id').values_list(
+            'user_id', 'author_id'
+        )
+        if users:
+            subscriptions = subscriptions.filter(user_id__in=users)
+        recent = {}
+        followers = entries = 0
+        for user_id, rows in groupby(
+            subscriptions.iterator(chunk_size=batch_size),
+            key=lambda row: row[0]
+        ):
+            with transaction.atomic():
+                entries += follow(
+                    user_id, [author_id for _, author_id in rows], recent
+                )
+            followers += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Лента заполнена для {followers} подписчиков: {entries} записей '
+            f'за {time.perf_counter() - start:.2f} с'
+        ))
@@ -0,0 +1,85 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.cart import rebuild_carts
+from recipes.models import (
+    CartIngredient, Ingredient, IngredientsInRecipe, Recipe, ShoppingCart
+)
+from recipes.units import UNITS, aggregate_amounts
+from users.models import User
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Замер агрегации списка покупок на синтетической корзине'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=5000)
+        parser.add_argument('--per-recipe', type=int, default=10)
+        parser.add_argument('--repeat', type=int, default=5)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(**options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def run(self, lines, per_recipe, repeat, **options):
+        user = User.objects.create(
+            username='benchmark_cart', email='benchmark_cart@example.com'
+        )
+        ingredients = Ingredient.objects.bulk_create(
+            Ingredient(
+                name=f'ингредиент {number // len(UNITS)}',
+                measurement_unit=list(UNITS)[number % len(UNITS)]
+            )
+            for number in range(per_recipe * 20)
+        )
+        recipes = Recipe.objects.bulk_create(
+            Recipe(author=user, name=f'рецепт {number}', text='benchmark')
+            for number in range(max(lines // per_recipe, 1))
+        )
+        if not recipes[0].pk:
+            recipes = list(Recipe.objects.filter(author=user))
+            ingredients = list(Ingredient.objects.filter(
+                name__startswith='ингредиент '
+            ))
+        IngredientsInRecipe.objects.bulk_create(
+            IngredientsInRecipe(
+                recipe=recipe, ingredient=ingredient,
+                amount=random.randint(1, 1000)
+            )
+            for recipe in recipes
+            for ingredient in random.sample(ingredients, per_recipe)
+        )
+        ShoppingCart.objects.bulk_create(
+            ShoppingCart(user=user, recipe=recipe) for recipe in recipes
+        )
+        rebuild_carts([user.id])
+        lines = IngredientsInRecipe.objects.filter(
+            recipe__shopping_cart__user=user
+        ).count()
+        for title, queryset in (
+            ('Корзина', IngredientsInRecipe.objects.filter(
+                recipe__shopping_cart__user=user
+            )),
+            ('Сводная таблица', CartIngredient.objects.filter(user=user)),
+        ):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                rows = list(aggregate_amounts(queryset))
+                timings.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'{title}: {lines} строк корзины -> {len(rows)} позиций: '
+                f'min {min(timings) * 1000:.1f} мс, '
+                f'max {max(timings) * 1000:.1f} мс'
+            )
@@ -0,0 +1,32 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import rebuild_similar, sparse, update_similar
+
+
+class Command(BaseCommand):
+    help = 'Расчёт таблицы похожих рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true')
+        parser.add_argument(
+            '--top-k', type=int, default=settings.SIMILAR_RECIPES_COUNT
+        )
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=os.cpu_count())
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, incremental, top_k, chunk_size, workers,
+               batch_size, **options):
+        start = time.perf_counter()
+        build = update_similar if incremental else rebuild_similar
+        recipes, saved = build(top_k, chunk_size, workers, batch_size)
+        engine = 'scipy' if sparse is not None else 'python'
+        self.stdout.write(self.style.SUCCESS(
+            f'Обработано {recipes} рецептов, сохранено {saved} пар '
+            f'({engine}, процессов: {workers}) '
+            f'за {time.perf_counter() - start:.2f} с'
+        ))
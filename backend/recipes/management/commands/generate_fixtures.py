@@ -0,0 +1,181 @@
+import random
+import time
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from recipes.cart import rebuild_carts
+from recipes.counters import recount
+from recipes.models import (
+    Favorite, Ingredient, IngredientsInRecipe, Recipe, ShoppingCart, Tag
+)
+from recipes.search import update_search_index
+from recipes.tag_mask import RecipeTags, update_tags_mask
+from users.models import Subscribe, User
+
+PREFIX = 'fixture'
+PASSWORD = 'fixture-Pa55word'
+WORDS = (
+    'домашний', 'быстрый', 'праздничный', 'летний', 'острый', 'нежный',
+    'пирог', 'суп', 'салат', 'рагу', 'омлет', 'запеканка', 'паста',
+    'с', 'курицей', 'грибами', 'сыром', 'овощами', 'ягодами', 'рисом',
+)
+
+
+def zipf_weights(size, exponent=1.1):
+    return list(accumulate(
+        1 / rank ** exponent for rank in range(1, size + 1)
+    ))
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетических пользователей, рецептов и связей'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--recipes', type=int, default=10000)
+        parser.add_argument('--ingredients-per-recipe', type=int, default=8)
+        parser.add_argument('--favorites', type=int, default=20)
+        parser.add_argument('--cart', type=int, default=5)
+        parser.add_argument('--subscriptions', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        self.random = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        self.prepare_dictionaries()
+        with transaction.atomic():
+            users = self.create_users(options['users'])
+            recipes = self.create_recipes(
+                users, options['recipes'], options['ingredients_per_recipe']
+            )
+            self.create_relations(users, recipes, options)
+            self.stdout.write('Пересчёт счётчиков и индексов')
+            recount(Recipe.objects.filter(id__in=recipes))
+            recount(User.objects.filter(id__in=users))
+            for first in range(0, len(recipes), self.batch_size):
+                batch = recipes[first:first + self.batch_size]
+                update_tags_mask(batch)
+                update_search_index(batch)
+            for first in range(0, len(users), self.batch_size):
+                rebuild_carts(users[first:first + self.batch_size])
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано {len(users)} пользователей и {len(recipes)} рецептов '
+            f'за {time.perf_counter() - start:.2f} с'
+        ))
+
+    def prepare_dictionaries(self):
+        if not Ingredient.objects.exists():
+            call_command('load_ingredients', stdout=self.stdout)
+        if not Tag.objects.exists():
+            call_command('load_tags', stdout=self.stdout)
+        self.ingredients = list(
+            Ingredient.objects.values_list('id', flat=True)
+        )
+        self.random.shuffle(self.ingredients)
+        self.ingredient_weights = zipf_weights(len(self.ingredients))
+        self.tags = list(Tag.objects.values_list('id', flat=True))
+        self.random.shuffle(self.tags)
+        self.tag_weights = zipf_weights(len(self.tags), exponent=0.8)
+
+    def bulk_create(self, model, objects):
+        for first in range(0, len(objects), self.batch_size):
+            model.objects.bulk_create(
+                objects[first:first + self.batch_size], ignore_conflicts=True
+            )
+
+    def create_users(self, count):
+        offset = User.objects.filter(username__startswith=PREFIX).count()
+        password = make_password(PASSWORD)
+        usernames = [f'{PREFIX}{offset + number}' for number in range(count)]
+        self.bulk_create(User, [
+            User(
+                username=username, email=f'{username}@example.com',
+                first_name='Тестовый', last_name=username, password=password
+            )
+            for username in usernames
+        ])
+        return list(User.objects.filter(
+            username__in=usernames
+        ).values_list('id', flat=True))
+
+    def create_recipes(self, users, count, ingredients_per_recipe):
+        authors = self.random.choices(
+            users, cum_weights=zipf_weights(len(users)), k=count
+        )
+        last_id = Recipe.objects.aggregate(last_id=Max('id'))['last_id']
+        self.bulk_create(Recipe, [
+            Recipe(
+                author_id=author,
+                name=' '.join(self.random.sample(WORDS, 3)).capitalize(),
+                text='Сгенерированный рецепт',
+                cooking_time=self.random.randint(5, 180)
+            )
+            for author in authors
+        ])
+        recipes = list(Recipe.objects.filter(
+            id__gt=last_id or 0
+        ).values_list('id', flat=True))
+        self.stdout.write(f'Рецепты: {len(recipes)}')
+        amounts = []
+        tags = []
+        for recipe in recipes:
+            size = max(1, int(self.random.gauss(ingredients_per_recipe, 3)))
+            amounts.extend(
+                IngredientsInRecipe(
+                    recipe_id=recipe, ingredient_id=ingredient,
+                    amount=self.random.choice((1, 2, 5, 10, 50, 100, 250))
+                )
+                for ingredient in self.sample(
+                    self.ingredients, self.ingredient_weights, size
+                )
+            )
+            tags.extend(
+                RecipeTags(recipe_id=recipe, tag_id=tag)
+                for tag in self.sample(
+                    self.tags, self.tag_weights, self.random.randint(1, 3)
+                )
+            )
+        self.bulk_create(IngredientsInRecipe, amounts)
+        self.bulk_create(RecipeTags, tags)
+        self.stdout.write(f'Ингредиенты в рецептах: {len(amounts)}')
+        return recipes
+
+    def sample(self, population, cum_weights, size):
+        size = min(size, len(population))
+        chosen = set()
+        while len(chosen) < size:
+            chosen.update(self.random.choices(
+                population, cum_weights=cum_weights, k=size - len(chosen)
+            ))
+        return chosen
+
+    def create_relations(self, users, recipes, options):
+        recipe_weights = zipf_weights(len(recipes))
+        author_weights = zipf_weights(len(users))
+        for model, field, population, weights, per_user in (
+            (Favorite, 'recipe_id', recipes, recipe_weights,
+             options['favorites']),
+            (ShoppingCart, 'recipe_id', recipes, recipe_weights,
+             options['cart']),
+            (Subscribe, 'author_id', users, author_weights,
+             options['subscriptions']),
+        ):
+            objects = []
+            for user in users:
+                size = self.random.randint(0, per_user * 2)
+                objects.extend(
+                    model(user_id=user, **{field: target})
+                    for target in self.sample(population, weights, size)
+                    if target != user or model is not Subscribe
+                )
+            self.bulk_create(model, objects)
+            self.stdout.write(
+                f'{model.__name__}: {len(objects)}'
+            )
@@ -0,0 +1,16 @@
+from recipes.ingredient_index import invalidate
+from recipes.models import Ingredient
+
+from ._bulk_load import BulkLoadCommand
+
+
+class Command(BulkLoadCommand):
+    help = 'Загрузка ингредиентов из CSV или JSON'
+    model = Ingredient
+    fields = ('name', 'measurement_unit')
+    key_fields = ('name', 'measurement_unit')
+    default_file = 'ingredients.csv'
+
+    def handle(self, *args, **options):
+        super().handle(*args, **options)
+        invalidate()
@@ -0,0 +1,20 @@
+from django.db import transaction
+
+from recipes.models import Tag
+from recipes.tag_mask import invalidate_tag_bits
+from ._bulk_load import BulkLoadCommand
+
+
+class Command(BulkLoadCommand):
+    help = 'Загрузка тегов из CSV или JSON'
+    model = Tag
+    fields = ('name', 'color', 'slug')
+    key_fields = ('slug',)
+    default_file = 'tags.csv'
+
+    def flush(self, create, update):
+        free_bits = Tag.free_bits()
+        for tag in create:
+            tag.bit = next(free_bits, None)
+        super().flush(create, update)
+        transaction.on_commit(invalidate_tag_bits)
@@ -0,0 +1,42 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from recipes.models import FeedEntry
+
+
+class Command(BaseCommand):
+    help = 'Удаление старых записей из ленты подписок'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep', type=int, default=None)
+        parser.add_argument('--older-than-days', type=int)
+
+    def handle(self, *args, keep, older_than_days, **options):
+        start = time.perf_counter()
+        keep = settings.FEED_MAX_LENGTH if keep is None else keep
+        deleted = 0
+        if older_than_days is not None:
+            deleted += FeedEntry.objects.filter(
+                pub_date__lt=timezone.now() - timedelta(days=older_than_days)
+            ).delete()[0]
+        overflowing = FeedEntry.objects.order_by().values('user_id').annotate(
+            total=Count('id')
+        ).filter(total__gt=keep).values_list('user_id', flat=True)
+        for user_id in list(overflowing):
+            entries = FeedEntry.objects.filter(user_id=user_id)
+            pub_date, recipe_id = entries.order_by(
+                '-pub_date', '-recipe_id'
+            ).values_list('pub_date', 'recipe_id')[keep]
+            deleted += entries.filter(
+                Q(pub_date__lt=pub_date)
+                | Q(pub_date=pub_date, recipe_id__lte=recipe_id)
+            ).delete()[0]
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено {deleted} записей ленты '
+            f'за {time.perf_counter() - start:.2f} с'
+        ))
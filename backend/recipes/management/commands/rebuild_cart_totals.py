@@ -0,0 +1,56 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max
+
+from recipes.cart import live_totals, rebuild_carts, stored_totals
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверка и пересборка сводной таблицы продуктов в списках покупок'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--check', action='store_true',
+            help='Только сверить таблицу, не пересобирая её'
+        )
+
+    def handle(self, *args, batch_size, check, **options):
+        start = time.perf_counter()
+        last_id = User.objects.aggregate(last_id=Max('pk'))['last_id']
+        mismatched = set()
+        rows = 0
+        for first_id in range(1, (last_id or 0) + 1, batch_size):
+            with transaction.atomic():
+                user_ids = list(User.objects.filter(
+                    pk__gte=first_id, pk__lt=first_id + batch_size
+                ).values_list('id', flat=True))
+                live = live_totals(user_ids)
+                stored = stored_totals(user_ids)
+                mismatched.update(
+                    user_id for user_id, ingredient_id in live.keys()
+                    | stored.keys()
+                    if live.get((user_id, ingredient_id))
+                    != stored.get((user_id, ingredient_id))
+                )
+                rows += len(live)
+                if not check:
+                    rebuild_carts(user_ids)
+        self.stdout.write(
+            f'Позиций в списках покупок: {rows}, расхождения у '
+            f'{len(mismatched)} пользователей'
+        )
+        if check and mismatched:
+            raise CommandError(
+                f'Сводная таблица расходится с корзинами пользователей: '
+                f'{sorted(mismatched)[:20]}'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            ('Сверено' if check else 'Пересобрано')
+            + f' за {time.perf_counter() - start:.2f} с'
+        ))
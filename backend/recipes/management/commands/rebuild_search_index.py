@@ -0,0 +1,33 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.search import update_search_index
+
+
+class Command(BaseCommand):
+    help = 'Пересборка поискового индекса рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, batch_size, **options):
+        start = time.perf_counter()
+        recipe_ids = Recipe.objects.order_by('id').values_list(
+            'id', flat=True
+        )
+        batch = []
+        total = 0
+        for recipe_id in recipe_ids.iterator(chunk_size=batch_size):
+            batch.append(recipe_id)
+            if len(batch) == batch_size:
+                update_search_index(batch)
+                total += len(batch)
+                batch = []
+        update_search_index(batch)
+        total += len(batch)
+        self.stdout.write(self.style.SUCCESS(
+            f'Проиндексировано {total} рецептов '
+            f'за {time.perf_counter() - start:.2f} с'
+        ))
@@ -0,0 +1,31 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from recipes.counters import recount
+from recipes.models import Recipe
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт счётчиков избранного, покупок, рецептов и подписчиков'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, batch_size, **options):
+        for model in (Recipe, User):
+            start = time.perf_counter()
+            last_id = model.objects.aggregate(last_id=Max('pk'))['last_id']
+            updated = 0
+            for first_id in range(1, (last_id or 0) + 1, batch_size):
+                with transaction.atomic():
+                    updated += recount(model.objects.filter(
+                        pk__gte=first_id, pk__lt=first_id + batch_size
+                    ))
+            self.stdout.write(self.style.SUCCESS(
+                f'{model._meta.verbose_name}: пересчитано {updated} '
+                f'за {time.perf_counter() - start:.2f} с'
+            ))
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from recipes.ranking import refresh_scores
+
+
+class Command(BaseCommand):
+    help = 'Пересчёт популярности и трендовости рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, full, batch_size, **options):
+        start = time.perf_counter()
+        with transaction.atomic():
+            refreshed, was_full = refresh_scores(full, batch_size)
+        mode = 'полный' if was_full else 'инкрементальный'
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано {refreshed} рецептов ({mode} режим) '
+            f'за {time.perf_counter() - start:.2f} с'
+        ))
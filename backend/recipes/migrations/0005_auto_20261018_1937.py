@@ -0,0 +1,49 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:37
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('recipes', 'Ingredient')
+    IngredientsInRecipe = apps.get_model('recipes', 'IngredientsInRecipe')
+    groups = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(keep=Min('id'), total=Count('id')).filter(total__gt=1)
+    for group in groups:
+        duplicates = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit']
+        ).exclude(id=group['keep']).values_list('id', flat=True))
+        for item in IngredientsInRecipe.objects.filter(
+            ingredient_id__in=duplicates
+        ).order_by('id'):
+            kept = IngredientsInRecipe.objects.filter(
+                recipe_id=item.recipe_id, ingredient_id=group['keep']
+            ).first()
+            if kept is None:
+                item.ingredient_id = group['keep']
+                item.save(update_fields=['ingredient'])
+            else:
+                kept.amount += item.amount
+                kept.save(update_fields=['amount'])
+                item.delete()
+        Ingredient.objects.filter(id__in=duplicates).delete()
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0004_auto_20221005_0756'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient_measurement_unit'),
+        ),
+    ]
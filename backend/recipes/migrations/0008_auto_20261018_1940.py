@@ -0,0 +1,120 @@
+# Generated by Django 2.2.28 on 2026-10-18 19:40
+
+import re
+from collections import defaultdict
+
+import django.contrib.postgres.search
+from django.db import migrations, models
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+WEIGHTS = {'name': 3, 'ingredients': 2, 'text': 1}
+STEM_LENGTH = 5
+WORD = re.compile(r'\w+')
+
+UPDATE_VECTOR_SQL = '''
+UPDATE recipes_recipe SET search_vector =
+    setweight(to_tsvector('russian', name), 'A')
+    || setweight(to_tsvector('russian', coalesce((
+        SELECT string_agg(ingredient.name, ' ')
+        FROM recipes_ingredientsinrecipe amount
+        JOIN recipes_ingredient ingredient
+            ON ingredient.id = amount.ingredient_id
+        WHERE amount.recipe_id = recipes_recipe.id
+    ), '')), 'B')
+    || setweight(to_tsvector('russian', text), 'C')
+WHERE id = ANY(%s)
+'''
+
+
+def tokenize(text):
+    return {
+        word[:STEM_LENGTH]
+        for word in WORD.findall(text.casefold().replace('ё', 'е'))
+        if len(word) > 1
+    }
+
+
+def fill_search_index(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientsInRecipe = apps.get_model('recipes', 'IngredientsInRecipe')
+    RecipeSearchToken = apps.get_model('recipes', 'RecipeSearchToken')
+    recipe_ids = list(Recipe.objects.order_by('id').values_list(
+        'id', flat=True
+    ))
+    for first in range(0, len(recipe_ids), BATCH_SIZE):
+        batch = recipe_ids[first:first + BATCH_SIZE]
+        if schema_editor.connection.vendor == 'postgresql':
+            schema_editor.execute(UPDATE_VECTOR_SQL, [batch])
+            continue
+        ingredients = defaultdict(list)
+        for recipe_id, name in IngredientsInRecipe.objects.filter(
+            recipe_id__in=batch
+        ).values_list('recipe_id', 'ingredient__name'):
+            ingredients[recipe_id].append(name)
+        tokens = []
+        for recipe_id, name, text in Recipe.objects.filter(
+            id__in=batch
+        ).values_list('id', 'name', 'text'):
+            weights = defaultdict(int)
+            for field, value in (
+                ('name', name),
+                ('ingredients', ' '.join(ingredients[recipe_id])),
+                ('text', text),
+            ):
+                for token in tokenize(value):
+                    weights[token] += WEIGHTS[field]
+            tokens.extend(
+                RecipeSearchToken(
+                    recipe_id=recipe_id, token=token, weight=weight
+                )
+                for token, weight in weights.items()
+            )
+        RecipeSearchToken.objects.bulk_create(tokens)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            'CREATE INDEX recipe_search_vector_idx ON recipes_recipe '
+            'USING gin (search_vector)'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS recipe_search_vector_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0007_auto_20261018_1939'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name='RecipeSearchToken',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=32, verbose_name='Токен')),
+                ('weight', models.PositiveSmallIntegerField(verbose_name='Вес')),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='recipes.Recipe', verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Токен поиска',
+                'verbose_name_plural': 'Токены поиска',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='recipesearchtoken',
+            constraint=models.UniqueConstraint(fields=('token', 'recipe'), name='unique_search_token_recipe'),
+        ),
+        migrations.RunPython(fill_search_index, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
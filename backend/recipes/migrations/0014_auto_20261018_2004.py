@@ -0,0 +1,60 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:04
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+import django.db.models.deletion
+
+BATCH_SIZE = 1000
+
+
+def fill_cart_totals(apps, schema_editor):
+    IngredientsInRecipe = apps.get_model('recipes', 'IngredientsInRecipe')
+    CartIngredient = apps.get_model('recipes', 'CartIngredient')
+    rows = IngredientsInRecipe.objects.filter(
+        recipe__shopping_cart__isnull=False
+    ).values('recipe__shopping_cart__user', 'ingredient').annotate(
+        total=Sum('amount'), recipes=Count('id')
+    ).order_by().values_list(
+        'recipe__shopping_cart__user', 'ingredient', 'total', 'recipes'
+    )
+    batch = []
+    for user_id, ingredient_id, amount, recipes_count in rows.iterator():
+        batch.append(CartIngredient(
+            user_id=user_id, ingredient_id=ingredient_id, amount=amount,
+            recipes_count=recipes_count
+        ))
+        if len(batch) == BATCH_SIZE:
+            CartIngredient.objects.bulk_create(batch)
+            batch = []
+    CartIngredient.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0013_auto_20261018_1956'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CartIngredient',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.BigIntegerField(verbose_name='Количество')),
+                ('recipes_count', models.IntegerField(verbose_name='Рецептов в списке покупок')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='recipes.Ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_ingredients', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Продукт в списке покупок',
+                'verbose_name_plural': 'Продукты в списках покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='cartingredient',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_cart_user_ingredient'),
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:08
+
+from django.db import migrations, models
+
+UPPER_NAME_INDEX = 'ingredient_name_upper_idx'
+
+
+def create_upper_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX {UPPER_NAME_INDEX} ON recipes_ingredient '
+        '(UPPER(name::text) text_pattern_ops)'
+    )
+
+
+def drop_upper_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {UPPER_NAME_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_auto_20261018_2004'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['name'], name='ingredient_name_prefix_idx', opclasses=('varchar_pattern_ops',)),
+        ),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['author', '-pub_date', '-id'], name='recipe_author_pub_date_idx'),
+        ),
+        migrations.RunPython(create_upper_name_index, drop_upper_name_index),
+    ]
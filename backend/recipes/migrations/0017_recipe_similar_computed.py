@@ -0,0 +1,27 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:24
+
+from django.db import migrations, models
+
+
+def mark_computed(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    SimilarRecipe = apps.get_model('recipes', 'SimilarRecipe')
+    Recipe.objects.filter(
+        id__in=SimilarRecipe.objects.values('recipe_id')
+    ).update(similar_computed=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0016_rankingstate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='similar_computed',
+            field=models.BooleanField(default=False, editable=False, verbose_name='Похожие рецепты посчитаны'),
+        ),
+        migrations.RunPython(mark_computed, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 2.2.28 on 2026-10-18 20:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0017_recipe_similar_computed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RankingChange',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('recipe_id', models.IntegerField(verbose_name='Рецепт')),
+            ],
+            options={
+                'verbose_name': 'Изменение рейтинга',
+                'verbose_name_plural': 'Изменения рейтинга',
+            },
+        ),
+    ]
@@ -1,6 +1,7 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-from users.models import User
+from users.models import CountersMixin, User
 
 
 class Ingredient(models.Model):
@@ -11,11 +12,27 @@ class Ingredient(models.Model):
         ordering = ['name', ]
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        indexes = [
+            models.Index(
+                fields=('name',),
+                name='ingredient_name_prefix_idx',
+                opclasses=('varchar_pattern_ops',)
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit',),
+                name='unique_ingredient_measurement_unit'
+            )
+        ]
 
     def __str__(self):
         return self.name
 
 
+TAG_BITS = 63
+
+
 class Tag(models.Model):
     name = models.CharField(
         'Название тега',
@@ -32,6 +49,12 @@ class Tag(models.Model):
         max_length=200,
         unique=True
     )
+    bit = models.PositiveSmallIntegerField(
+        'Бит в маске тегов',
+        unique=True,
+        null=True,
+        editable=False
+    )
 
     class Meta:
         ordering = ['name', ]
@@ -41,8 +64,20 @@ class Tag(models.Model):
     def __str__(self):
         return self.name
 
+    @staticmethod
+    def free_bits():
+        used = set(Tag.objects.exclude(bit=None).values_list(
+            'bit', flat=True
+        ))
+        return (bit for bit in range(TAG_BITS) if bit not in used)
+
+    def save(self, *args, **kwargs):
+        if self.bit is None:
+            self.bit = next(Tag.free_bits(), None)
+        super().save(*args, **kwargs)
 
-class Recipe(models.Model):
+
+class Recipe(CountersMixin, models.Model):
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
@@ -75,16 +110,88 @@ class Recipe(models.Model):
         default=1
     )
     pub_date = models.DateTimeField('Дата публикации', auto_now_add=True)
+    favorites_count = models.PositiveIntegerField(
+        'В избранном',
+        default=0,
+        editable=False
+    )
+    cart_count = models.PositiveIntegerField(
+        'В списках покупок',
+        default=0,
+        editable=False
+    )
+    search_vector = SearchVectorField(null=True, editable=False)
+    tags_mask = models.BigIntegerField(
+        'Маска тегов',
+        default=0,
+        editable=False
+    )
+    popular_score = models.FloatField(
+        'Популярность',
+        default=0,
+        editable=False
+    )
+    trending_score = models.FloatField(
+        'Тренд',
+        default=0,
+        editable=False
+    )
+    similar_computed = models.BooleanField(
+        'Похожие рецепты посчитаны',
+        default=False,
+        editable=False
+    )
+
+    counter_fields = ('favorites_count', 'cart_count')
 
     class Meta:
         ordering = ['-pub_date', ]
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='recipe_author_pub_date_idx'
+            ),
+            models.Index(
+                fields=('-popular_score', '-id'),
+                name='recipe_popular_idx'
+            ),
+            models.Index(
+                fields=('-trending_score', '-id'),
+                name='recipe_trending_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeSearchToken(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='search_tokens',
+        verbose_name='Рецепт'
+    )
+    token = models.CharField('Токен', max_length=32)
+    weight = models.PositiveSmallIntegerField('Вес')
+
+    class Meta:
+        verbose_name = 'Токен поиска'
+        verbose_name_plural = 'Токены поиска'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('token', 'recipe',),
+                name='unique_search_token_recipe'
+            )
+        ]
+
+
 class IngredientsInRecipe(models.Model):
     recipe = models.ForeignKey(
         Recipe,
@@ -121,10 +228,19 @@ class Favorite(models.Model):
         related_name='favorites',
         verbose_name='Избранный рецепт'
     )
+    created = models.DateTimeField(
+        'Добавлено', auto_now_add=True, null=True, db_index=True
+    )
 
     class Meta:
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
+        indexes = [
+            models.Index(
+                fields=('user', 'recipe'),
+                name='favorite_user_recipe_idx'
+            )
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('recipe', 'user'),
@@ -146,10 +262,19 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         verbose_name='Рецепт'
     )
+    created = models.DateTimeField(
+        'Добавлено', auto_now_add=True, null=True, db_index=True
+    )
 
     class Meta:
         verbose_name = 'Список покупок'
         verbose_name_plural = 'Списки покупок'
+        indexes = [
+            models.Index(
+                fields=('user', 'recipe'),
+                name='cart_user_recipe_idx'
+            )
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('recipe', 'user'),
@@ -159,3 +284,116 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f"Список покупок пользователя {self.user.username}"
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Подписчик'
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор рецепта'
+    )
+    pub_date = models.DateTimeField('Дата публикации')
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_user_pub_date_idx'
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_user_recipe'
+            )
+        ]
+
+
+class SimilarRecipe(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='similar',
+        verbose_name='Рецепт'
+    )
+    similar = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Похожий рецепт'
+    )
+    score = models.FloatField('Сходство')
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        indexes = [
+            models.Index(
+                fields=('recipe', '-score'),
+                name='similar_recipe_score_idx'
+            )
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=('recipe', 'similar'),
+                name='unique_similar_recipe'
+            )
+        ]
+
+
+class CartIngredient(models.Model):
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='cart_ingredients',
+        verbose_name='Пользователь'
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Ингредиент'
+    )
+    amount = models.BigIntegerField('Количество')
+    recipes_count = models.IntegerField('Рецептов в списке покупок')
+
+    class Meta:
+        verbose_name = 'Продукт в списке покупок'
+        verbose_name_plural = 'Продукты в списках покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_cart_user_ingredient'
+            )
+        ]
+
+
+class RankingState(models.Model):
+    refreshed_at = models.DateTimeField('Пересчитано', null=True)
+
+    class Meta:
+        verbose_name = 'Состояние рейтинга'
+        verbose_name_plural = 'Состояние рейтинга'
+
+
+class RankingChange(models.Model):
+    recipe_id = models.IntegerField('Рецепт')
+
+    class Meta:
+        verbose_name = 'Изменение рейтинга'
+        verbose_name_plural = 'Изменения рейтинга'
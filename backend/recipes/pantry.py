@@ -0,0 +1,183 @@
+import heapq
+import time
+from array import array
+from collections import Counter, defaultdict
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Q
+from django.db.models.functions import Cast
+
+from .models import IngredientsInRecipe
+
+VERSION_KEY = 'pantry_index_version'
+CHANGE_TIMEOUT = 24 * 60 * 60
+MAX_REPLAY = 1000
+MAX_DEAD_SHARE = 0.25
+
+
+def change_key(version):
+    return f'pantry_index_change:{version}'
+
+
+def current_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def record_change(recipe_ids):
+    try:
+        version = cache.incr(VERSION_KEY)
+    except ValueError:
+        current_version()
+        return
+    cache.set(change_key(version), recipe_ids, timeout=CHANGE_TIMEOUT)
+
+
+def recipes_changed(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    transaction.on_commit(lambda: record_change(recipe_ids))
+
+
+def recipe_deleted(sender, instance, **kwargs):
+    recipes_changed([instance.id])
+
+
+class PantryIndex:
+    def __init__(self):
+        self.version = None
+        self.data = self.empty()
+        self.dead = 0
+        self.lock = Lock()
+
+    @staticmethod
+    def empty():
+        return array('q'), array('H'), {}, defaultdict(lambda: array('I'))
+
+    @staticmethod
+    def append(data, rows):
+        recipe_ids, sizes, positions, postings = data
+        for recipe_id, ingredients in rows:
+            position = len(recipe_ids)
+            recipe_ids.append(recipe_id)
+            sizes.append(len(ingredients))
+            positions[recipe_id] = position
+            for ingredient_id in ingredients:
+                postings[ingredient_id].append(position)
+
+    def load(self, data, queryset):
+        recipes = defaultdict(set)
+        for recipe_id, ingredient_id in queryset.order_by(
+            'recipe_id'
+        ).values_list('recipe_id', 'ingredient_id').iterator():
+            recipes[recipe_id].add(ingredient_id)
+        self.append(data, recipes.items())
+
+    def build(self, version):
+        data = self.empty()
+        self.load(data, IngredientsInRecipe.objects.all())
+        self.data = data
+        self.dead = 0
+        self.version = version
+
+    def apply(self, recipe_ids, version):
+        sizes, positions = self.data[1:3]
+        for recipe_id in recipe_ids:
+            position = positions.pop(recipe_id, None)
+            if position is not None:
+                sizes[position] = 0
+                self.dead += 1
+        self.load(
+            self.data,
+            IngredientsInRecipe.objects.filter(recipe_id__in=recipe_ids)
+        )
+        self.version = version
+
+    def changes_since(self, version):
+        if self.version is None or not 0 < version - self.version:
+            return None
+        if version - self.version > MAX_REPLAY:
+            return None
+        keys = [
+            change_key(number)
+            for number in range(self.version + 1, version + 1)
+        ]
+        changes = cache.get_many(keys)
+        if len(changes) != len(keys):
+            return None
+        return {
+            recipe_id for recipe_ids in changes.values()
+            for recipe_id in recipe_ids
+        }
+
+    def refresh(self):
+        version = current_version()
+        if version is not None and self.version == version:
+            return
+        with self.lock:
+            if version is not None and self.version == version:
+                return
+            changed = version and self.changes_since(version)
+            if changed is None or self.dead > MAX_DEAD_SHARE * len(
+                self.data[0]
+            ):
+                self.build(version)
+            else:
+                self.apply(changed, version)
+
+    def match(self, ingredient_ids, limit, min_coverage=0):
+        self.refresh()
+        recipe_ids, sizes, _, postings = self.data
+        counts = Counter()
+        for ingredient_id in set(ingredient_ids):
+            counts.update(postings.get(ingredient_id, ()))
+        candidates = (
+            (
+                matched / sizes[position], matched, recipe_ids[position],
+                sizes[position]
+            )
+            for position, matched in counts.items()
+            if sizes[position] and matched / sizes[position] >= min_coverage
+        )
+        return [
+            (recipe_id, matched, total)
+            for coverage, matched, recipe_id, total in heapq.nlargest(
+                limit, candidates
+            )
+        ]
+
+
+def match_sql(ingredient_ids, limit, min_coverage=0):
+    rows = IngredientsInRecipe.objects.order_by().values(
+        'recipe_id'
+    ).annotate(
+        matched=Count(
+            'ingredient_id', distinct=True,
+            filter=Q(ingredient_id__in=set(ingredient_ids))
+        ),
+        total=Count('ingredient_id', distinct=True),
+    ).annotate(
+        coverage=ExpressionWrapper(
+            Cast('matched', FloatField()) / F('total'),
+            output_field=FloatField()
+        )
+    ).filter(
+        matched__gt=0, coverage__gte=min_coverage
+    ).order_by(
+        '-coverage', '-matched', '-recipe_id'
+    ).values_list('recipe_id', 'matched', 'total')[:limit]
+    return list(rows)
+
+
+pantry_index = PantryIndex()
+
+
+def match_recipes(ingredient_ids, limit, min_coverage=0):
+    if settings.PANTRY_INDEX_ENABLED:
+        return pantry_index.match(ingredient_ids, limit, min_coverage)
+    return match_sql(ingredient_ids, limit, min_coverage)
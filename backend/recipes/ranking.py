@@ -0,0 +1,110 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import (
+    Favorite, RankingChange, RankingState, Recipe, ShoppingCart
+)
+
+TRENDING_HALF_LIVES = 7
+WEIGHTS = ((Favorite, 1.0), (ShoppingCart, 2.0))
+ORDERINGS = {
+    'popular': ('-popular_score', '-id'),
+    'trending': ('-trending_score', '-id'),
+}
+
+
+def windows(now):
+    popular_since = now - timedelta(days=settings.RANKING_POPULAR_DAYS)
+    trending_since = now - timedelta(
+        hours=settings.RANKING_HALF_LIFE_HOURS * TRENDING_HALF_LIVES
+    )
+    return popular_since, min(popular_since, trending_since)
+
+
+def touched_recipes(since, until):
+    touched = set()
+    for model, weight in WEIGHTS:
+        touched.update(model.objects.filter(
+            created__gte=since, created__lt=until
+        ).order_by().values_list('recipe_id', flat=True).distinct())
+    return touched
+
+
+def reactions_deleted(recipe_ids):
+    RankingChange.objects.bulk_create(
+        RankingChange(recipe_id=recipe_id) for recipe_id in recipe_ids
+    )
+
+
+def reaction_deleted(sender, instance, **kwargs):
+    reactions_deleted([instance.recipe_id])
+
+
+def compute_scores(recipe_ids, now):
+    popular_since, horizon = windows(now)
+    half_life = settings.RANKING_HALF_LIFE_HOURS * 3600
+    scores = {recipe_id: [0.0, 0.0] for recipe_id in recipe_ids}
+    for model, weight in WEIGHTS:
+        for recipe_id, created in model.objects.filter(
+            recipe_id__in=recipe_ids, created__gte=horizon
+        ).values_list('recipe_id', 'created'):
+            score = scores[recipe_id]
+            if created >= popular_since:
+                score[0] += weight
+            score[1] += weight * 0.5 ** (
+                (now - created).total_seconds() / half_life
+            )
+    return scores
+
+
+def decay_trending(elapsed):
+    factor = 0.5 ** (
+        elapsed.total_seconds() / (settings.RANKING_HALF_LIFE_HOURS * 3600)
+    )
+    Recipe.objects.filter(trending_score__gt=0).update(
+        trending_score=F('trending_score') * factor
+    )
+
+
+def refresh_scores(full=False, batch_size=1000, now=None):
+    now = now or timezone.now()
+    state, _ = RankingState.objects.select_for_update().get_or_create(pk=1)
+    last = None if full else state.refreshed_at
+    popular_since, horizon = windows(now)
+    changes = dict(RankingChange.objects.values_list('id', 'recipe_id'))
+    if last is None:
+        touched = touched_recipes(horizon, now) | set(
+            Recipe.objects.filter(
+                Q(popular_score__gt=0) | Q(trending_score__gt=0)
+            ).values_list('id', flat=True)
+        )
+    else:
+        elapsed = now - last
+        decay_trending(elapsed)
+        touched = (
+            touched_recipes(last, now)
+            | touched_recipes(popular_since - elapsed, popular_since)
+            | touched_recipes(horizon - elapsed, horizon)
+        )
+    touched = sorted(touched | set(changes.values()))
+    for first in range(0, len(touched), batch_size):
+        scores = compute_scores(touched[first:first + batch_size], now)
+        Recipe.objects.bulk_update(
+            [
+                Recipe(id=recipe_id, popular_score=popular,
+                       trending_score=trending)
+                for recipe_id, (popular, trending) in scores.items()
+            ],
+            ['popular_score', 'trending_score']
+        )
+    changes = list(changes)
+    for first in range(0, len(changes), batch_size):
+        RankingChange.objects.filter(
+            id__in=changes[first:first + batch_size]
+        ).delete()
+    state.refreshed_at = now
+    state.save(update_fields=['refreshed_at'])
+    return len(touched), last is None
@@ -0,0 +1,103 @@
+import re
+from collections import defaultdict
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection, transaction
+from django.db.models import (
+    Count, F, IntegerField, OuterRef, Subquery, Sum
+)
+
+from .models import IngredientsInRecipe, Recipe, RecipeSearchToken
+
+CONFIG = 'russian'
+WEIGHTS = {'name': 3, 'ingredients': 2, 'text': 1}
+STEM_LENGTH = 5
+WORD = re.compile(r'\w+')
+
+UPDATE_VECTOR_SQL = f'''
+UPDATE recipes_recipe SET search_vector =
+    setweight(to_tsvector('{CONFIG}', name), 'A')
+    || setweight(to_tsvector('{CONFIG}', coalesce((
+        SELECT string_agg(ingredient.name, ' ')
+        FROM recipes_ingredientsinrecipe amount
+        JOIN recipes_ingredient ingredient
+            ON ingredient.id = amount.ingredient_id
+        WHERE amount.recipe_id = recipes_recipe.id
+    ), '')), 'B')
+    || setweight(to_tsvector('{CONFIG}', text), 'C')
+WHERE id = ANY(%s)
+'''
+
+
+def use_search_vector():
+    return connection.vendor == 'postgresql'
+
+
+def tokenize(text):
+    return {
+        word[:STEM_LENGTH]
+        for word in WORD.findall(text.casefold().replace('ё', 'е'))
+        if len(word) > 1
+    }
+
+
+def update_tokens(recipe_ids):
+    ingredients = defaultdict(list)
+    for recipe_id, name in IngredientsInRecipe.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values_list('recipe_id', 'ingredient__name'):
+        ingredients[recipe_id].append(name)
+    tokens = []
+    for recipe_id, name, text in Recipe.objects.filter(
+        id__in=recipe_ids
+    ).values_list('id', 'name', 'text'):
+        weights = defaultdict(int)
+        for field, value in (
+            ('name', name),
+            ('ingredients', ' '.join(ingredients[recipe_id])),
+            ('text', text),
+        ):
+            for token in tokenize(value):
+                weights[token] += WEIGHTS[field]
+        tokens.extend(
+            RecipeSearchToken(recipe_id=recipe_id, token=token, weight=weight)
+            for token, weight in weights.items()
+        )
+    RecipeSearchToken.objects.filter(recipe_id__in=recipe_ids).delete()
+    RecipeSearchToken.objects.bulk_create(tokens)
+
+
+def update_search_index(recipe_ids):
+    recipe_ids = list(recipe_ids)
+    if not recipe_ids:
+        return
+    with transaction.atomic():
+        if use_search_vector():
+            with connection.cursor() as cursor:
+                cursor.execute(UPDATE_VECTOR_SQL, [recipe_ids])
+        else:
+            update_tokens(recipe_ids)
+
+
+def search_recipes(queryset, value):
+    if use_search_vector():
+        query = SearchQuery(value, config=CONFIG)
+        return queryset.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query)
+        ).order_by('-rank', '-pub_date', '-id')
+    tokens = tokenize(value)
+    if not tokens:
+        return queryset.none()
+    matches = RecipeSearchToken.objects.filter(token__in=tokens)
+    return queryset.filter(
+        id__in=matches.order_by().values('recipe_id').annotate(
+            matched=Count('id')
+        ).filter(matched=len(tokens)).values('recipe_id')
+    ).annotate(
+        rank=Subquery(
+            matches.filter(recipe=OuterRef('pk')).order_by().values(
+                'recipe'
+            ).annotate(total=Sum('weight')).values('total'),
+            output_field=IntegerField()
+        )
+    ).order_by('-rank', '-pub_date', '-id')
@@ -0,0 +1,219 @@
+import heapq
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from math import sqrt
+from operator import itemgetter
+
+from django.db import connections, transaction
+from django.db.models import Q
+
+from .models import IngredientsInRecipe, Recipe, SimilarRecipe
+
+try:
+    import numpy
+    from scipy import sparse
+except ImportError:
+    numpy = sparse = None
+
+TAG_WEIGHT = 0.5
+worker_index = None
+
+
+class SimilarityIndex:
+    def __init__(self):
+        columns = {}
+        vectors = defaultdict(dict)
+        amounts = IngredientsInRecipe.objects.values_list(
+            'recipe_id', 'ingredient_id'
+        )
+        for recipe_id, ingredient_id in amounts.iterator():
+            column = columns.setdefault(('ingredient', ingredient_id),
+                                        len(columns))
+            vectors[recipe_id][column] = 1.0
+        for recipe_id, tag_id in Recipe.tags.through.objects.values_list(
+            'recipe_id', 'tag_id'
+        ).iterator():
+            column = columns.setdefault(('tag', tag_id), len(columns))
+            vectors[recipe_id][column] = TAG_WEIGHT
+        self.recipe_ids = sorted(vectors)
+        self.rows = {
+            recipe_id: row for row, recipe_id in enumerate(self.recipe_ids)
+        }
+        self.vectors = []
+        for recipe_id in self.recipe_ids:
+            vector = vectors[recipe_id]
+            norm = sqrt(sum(weight * weight for weight in vector.values()))
+            self.vectors.append({
+                column: weight / norm for column, weight in vector.items()
+            })
+        if sparse is not None:
+            self.matrix = self.build_matrix(len(columns))
+            self.transposed = self.matrix.T.tocsr()
+        else:
+            self.postings = defaultdict(list)
+            for row, vector in enumerate(self.vectors):
+                for column, weight in vector.items():
+                    self.postings[column].append((row, weight))
+
+    def build_matrix(self, width):
+        indptr = [0]
+        indices = []
+        data = []
+        for vector in self.vectors:
+            indices.extend(vector)
+            data.extend(vector.values())
+            indptr.append(len(indices))
+        return sparse.csr_matrix(
+            (
+                numpy.array(data, dtype=numpy.float32),
+                numpy.array(indices, dtype=numpy.int32),
+                numpy.array(indptr, dtype=numpy.int64),
+            ),
+            shape=(len(self.vectors), width)
+        )
+
+    def neighbours(self, rows, top_k):
+        if sparse is not None:
+            return self.matrix_neighbours(rows, top_k)
+        return self.posting_neighbours(rows, top_k)
+
+    def matrix_neighbours(self, rows, top_k):
+        block = self.matrix[rows] @ self.transposed
+        result = []
+        for position, row in enumerate(rows):
+            start, end = block.indptr[position], block.indptr[position + 1]
+            columns = block.indices[start:end]
+            scores = block.data[start:end]
+            keep = columns != row
+            columns, scores = columns[keep], scores[keep]
+            if len(scores) > top_k:
+                best = numpy.argpartition(-scores, top_k)[:top_k]
+                columns, scores = columns[best], scores[best]
+            order = numpy.argsort(-scores, kind='stable')
+            result.append((self.recipe_ids[row], [
+                (self.recipe_ids[column], float(score))
+                for column, score in zip(columns[order], scores[order])
+            ]))
+        return result
+
+    def posting_neighbours(self, rows, top_k):
+        result = []
+        for row in rows:
+            scores = defaultdict(float)
+            for column, weight in self.vectors[row].items():
+                for other, other_weight in self.postings[column]:
+                    scores[other] += weight * other_weight
+            scores.pop(row, None)
+            result.append((self.recipe_ids[row], [
+                (self.recipe_ids[other], score)
+                for other, score in heapq.nlargest(
+                    top_k, scores.items(), key=itemgetter(1)
+                )
+            ]))
+        return result
+
+
+def init_worker(index):
+    global worker_index
+    worker_index = index
+
+
+def neighbours_chunk(rows, top_k):
+    return worker_index.neighbours(rows, top_k)
+
+
+def compute_neighbours(index, rows, top_k, chunk_size, workers):
+    chunks = [
+        rows[first:first + chunk_size]
+        for first in range(0, len(rows), chunk_size)
+    ]
+    if workers <= 1:
+        for chunk in chunks:
+            yield from index.neighbours(chunk, top_k)
+        return
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=init_worker, initargs=(index,)
+    ) as pool:
+        for result in pool.map(neighbours_chunk, chunks, repeat(top_k)):
+            yield from result
+
+
+def save_neighbours(neighbours, batch_size):
+    batch = []
+    saved = 0
+    for recipe_id, similar in neighbours:
+        batch.extend(
+            SimilarRecipe(
+                recipe_id=recipe_id, similar_id=similar_id, score=score
+            )
+            for similar_id, score in similar
+        )
+        if len(batch) >= batch_size:
+            SimilarRecipe.objects.bulk_create(batch)
+            saved += len(batch)
+            batch = []
+    SimilarRecipe.objects.bulk_create(batch)
+    return saved + len(batch)
+
+
+def mark_computed(recipe_ids, batch_size):
+    for first in range(0, len(recipe_ids), batch_size):
+        Recipe.objects.filter(
+            id__in=recipe_ids[first:first + batch_size]
+        ).update(similar_computed=True)
+
+
+def reset_similar(recipe_ids):
+    Recipe.objects.filter(id__in=recipe_ids).update(similar_computed=False)
+    SimilarRecipe.objects.filter(
+        Q(recipe_id__in=recipe_ids) | Q(similar_id__in=recipe_ids)
+    ).delete()
+
+
+def rebuild_similar(top_k, chunk_size=500, workers=1, batch_size=5000):
+    index = SimilarityIndex()
+    neighbours = list(compute_neighbours(
+        index, list(range(len(index.recipe_ids))), top_k, chunk_size,
+        workers
+    ))
+    with transaction.atomic():
+        SimilarRecipe.objects.all().delete()
+        mark_computed(index.recipe_ids, batch_size)
+        return len(neighbours), save_neighbours(neighbours, batch_size)
+
+
+def update_similar(top_k, chunk_size=500, workers=1, batch_size=5000):
+    index = SimilarityIndex()
+    known = set(Recipe.objects.filter(
+        similar_computed=True
+    ).values_list('id', flat=True))
+    rows = [
+        row for row, recipe_id in enumerate(index.recipe_ids)
+        if recipe_id not in known
+    ]
+    neighbours = []
+    candidates = defaultdict(list)
+    for recipe_id, similar in compute_neighbours(
+        index, rows, len(index.recipe_ids), chunk_size, workers
+    ):
+        neighbours.append((recipe_id, similar[:top_k]))
+        for similar_id, score in similar:
+            if similar_id in known:
+                candidates[similar_id].append((recipe_id, score))
+    with transaction.atomic():
+        current = SimilarRecipe.objects.filter(recipe_id__in=candidates)
+        for recipe_id, similar_id, score in current.values_list(
+            'recipe_id', 'similar_id', 'score'
+        ):
+            candidates[recipe_id].append((similar_id, score))
+        current.delete()
+        mark_computed(
+            [index.recipe_ids[row] for row in rows], batch_size
+        )
+        neighbours.extend(
+            (recipe_id, heapq.nlargest(top_k, similar, key=itemgetter(1)))
+            for recipe_id, similar in candidates.items()
+        )
+        return len(rows), save_neighbours(neighbours, batch_size)
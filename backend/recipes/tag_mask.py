@@ -0,0 +1,81 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+
+from .models import Recipe, Tag
+
+TAG_BITS_KEY = 'tag_bits'
+RecipeTags = Recipe.tags.through
+
+
+def tag_bits():
+    bits = cache.get(TAG_BITS_KEY)
+    if bits is None:
+        bits = dict(Tag.objects.values_list('slug', 'bit'))
+        cache.set(
+            TAG_BITS_KEY, bits, timeout=settings.TAG_BITS_CACHE_TIMEOUT
+        )
+    return bits
+
+
+def invalidate_tag_bits(**kwargs):
+    cache.delete(TAG_BITS_KEY)
+
+
+def update_tags_mask(recipe_ids):
+    recipe_ids = set(recipe_ids)
+    if not recipe_ids:
+        return
+    masks = defaultdict(int)
+    for recipe_id, bit in RecipeTags.objects.filter(
+        recipe_id__in=recipe_ids, tag__bit__isnull=False
+    ).values_list('recipe_id', 'tag__bit'):
+        masks[recipe_id] |= 1 << bit
+    Recipe.objects.bulk_update(
+        [
+            Recipe(id=recipe_id, tags_mask=masks[recipe_id])
+            for recipe_id in recipe_ids
+        ],
+        ['tags_mask']
+    )
+
+
+def tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        instance.cleared_recipe_ids = list(
+            instance.recipes.values_list('id', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        update_tags_mask([instance.pk])
+    elif action == 'post_clear':
+        update_tags_mask(instance.cleared_recipe_ids)
+    else:
+        update_tags_mask(pk_set)
+
+
+def tag_deleting(sender, instance, **kwargs):
+    instance.cleared_recipe_ids = list(
+        instance.recipes.values_list('id', flat=True)
+    )
+
+
+def tag_deleted(sender, instance, **kwargs):
+    update_tags_mask(instance.cleared_recipe_ids)
+    invalidate_tag_bits()
+
+
+def filter_by_tags(queryset, slugs):
+    bits = tag_bits()
+    if any(bits.get(slug, 0) is None for slug in slugs):
+        return queryset.filter(tags__slug__in=slugs).distinct()
+    mask = 0
+    for slug in slugs:
+        if slug in bits:
+            mask |= 1 << bits[slug]
+    return queryset.annotate(
+        tags_match=F('tags_mask').bitand(mask)
+    ).filter(tags_match__gt=0)
@@ -0,0 +1,60 @@
+from django.db.models import (
+    Case, CharField, F, FloatField, Sum, Value, When
+)
+
+UNITS = {
+    'г': ('г', 1),
+    'гр': ('г', 1),
+    'кг': ('г', 1000),
+    'мг': ('г', 0.001),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+    'шт': ('шт.', 1),
+    'ч.л.': ('ч. л.', 1),
+    'ст.л.': ('ст. л.', 1),
+}
+
+
+def canonical_unit(unit_field):
+    return Case(
+        *(
+            When(**{unit_field: unit}, then=Value(canonical))
+            for unit, (canonical, factor) in UNITS.items()
+            if unit != canonical
+        ),
+        default=F(unit_field),
+        output_field=CharField()
+    )
+
+
+def unit_factor(unit_field):
+    return Case(
+        *(
+            When(**{unit_field: unit}, then=Value(factor))
+            for unit, (canonical, factor) in UNITS.items()
+            if factor != 1
+        ),
+        default=Value(1),
+        output_field=FloatField()
+    )
+
+
+def normalize_amount(amount):
+    amount = round(amount, 3)
+    return int(amount) if float(amount).is_integer() else amount
+
+
+def aggregate_amounts(queryset, *group_fields,
+                      name_field='ingredient__name',
+                      unit_field='ingredient__measurement_unit',
+                      amount_field='amount'):
+    fields = (*group_fields, name_field, 'unit')
+    rows = queryset.annotate(
+        unit=canonical_unit(unit_field)
+    ).values(*fields).annotate(
+        total=Sum(
+            F(amount_field) * unit_factor(unit_field),
+            output_field=FloatField()
+        )
+    ).order_by(*fields).values_list(*fields, 'total')
+    return rows
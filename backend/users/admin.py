@@ -7,6 +7,6 @@ from users.models import User
 class UserAdmin(admin.ModelAdmin):
     list_display = (
         'id', 'username', 'email',
-        'first_name', 'last_name',
+        'first_name', 'last_name', 'recipes_count', 'followers_count',
     )
     list_filter = ('email', 'first_name')
@@ -10,7 +10,23 @@ ROLES_CHOICES = [
 ]
 
 
-class User(AbstractUser):
+class CountersMixin:
+    counter_fields = ()
+
+    def save(self, *args, **kwargs):
+        if (not args and not self._state.adding
+                and not kwargs.get('force_insert')
+                and kwargs.get('update_fields') is None):
+            skipped = {*self.counter_fields, *self.get_deferred_fields()}
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.attname not in skipped
+                and field.name not in skipped
+            ]
+        super().save(*args, **kwargs)
+
+
+class User(CountersMixin, AbstractUser):
     username = models.CharField(
         max_length=150,
         unique=True
@@ -35,6 +51,18 @@ class User(AbstractUser):
         choices=ROLES_CHOICES,
         default=USER
     )
+    recipes_count = models.PositiveIntegerField(
+        'Рецептов',
+        default=0,
+        editable=False
+    )
+    followers_count = models.PositiveIntegerField(
+        'Подписчиков',
+        default=0,
+        editable=False
+    )
+
+    counter_fields = ('recipes_count', 'followers_count')
 
     USERNAME_FIELD = 'email'
 
@@ -80,6 +108,12 @@ class Subscribe(models.Model):
 
     class Meta:
         verbose_name = 'Подписка',
+        indexes = [
+            models.Index(
+                fields=('author', 'user'),
+                name='subscribe_author_user_idx'
+            )
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=('user', 'author'),